@@ -1,6 +1,5 @@
 import os
 import asyncio
-import json
 import uuid
 import traceback
 from datetime import datetime, timezone, timedelta
@@ -11,11 +10,19 @@ from quart import Quart, request, jsonify, websocket, Response
 from quart_cors import cors
 
 from config import (
-    HISTORY_FILE, LAST_SEEN_FILE, CACHE_FILE, TOKENS_FILE, SHARED_CHATS_FILE,
+    LAST_SEEN_FILE, CACHE_FILE, TOKENS_FILE, HISTORY_FLUSH_SECS, SHARE_RENDER_TTL_SECS,
     GEMINI_API_KEYS, GEMINI_MODEL_NAME, DEEPSEEK_API_KEY,
 )
+from serialization import dumps, dumps_async, loads
 from cache import _resp_cache as resp_cache_inst
-from gemini import gemma_cevap_async, gemma_cevap_stream, get_nova_date
+from history_store import history_store
+from share_store import share_store
+from share_render import render_shared_chat, etag_matches
+from utils import open_scraper_session, close_scraper_session
+from scrapers.prefetch import run_prefetcher
+from relay import StreamRelay
+from gemini import gemma_cevap_async, gemma_cevap_stream
+from prompt import get_nova_date
 import templates
 
 app = Quart(__name__)
@@ -26,8 +33,8 @@ app = cors(app, allow_origin="*", allow_headers="*", allow_methods="*")
 # ============================================================
 session: aiohttp.ClientSession | None = None
 GLOBAL_CACHE = {"history": {}, "last_seen": {}, "api_cache": {}, "tokens": []}
-DIRTY_FLAGS  = {"history": False, "last_seen": False, "api_cache": False, "tokens": False}
-SHARED_CHATS: dict[str, dict] = {}
+DIRTY_FLAGS  = {"last_seen": False, "api_cache": False, "tokens": False}
+AUX_LOADED = False
 
 # ============================================================
 # YAŞAM DÖNGÜSÜ
@@ -44,19 +51,27 @@ async def startup():
     session = aiohttp.ClientSession(
         timeout=aiohttp.ClientTimeout(total=45, connect=10),
         connector=connector,
-        json_serialize=json.dumps,
+        json_serialize=dumps,
     )
-    await load_data_to_memory()
-    await load_shared_chats()
+    open_scraper_session()
+    await history_store.open()
+    GLOBAL_CACHE["history"] = history_store.data
+    await share_store.load()
+    app.add_background_task(load_data_to_memory)
     app.add_background_task(keep_alive)
     app.add_background_task(background_save_worker)
+    app.add_background_task(history_flush_worker)
+    app.add_background_task(share_store.run)
+    app.add_background_task(run_prefetcher, session)
 
 
 @app.after_serving
 async def cleanup():
     global session
     await save_memory_to_disk(force=True)
-    await save_shared_chats()
+    await history_store.compact()
+    await share_store.save()
+    await close_scraper_session()
     if session:
         await session.close()
 
@@ -69,42 +84,22 @@ def get_path(filename):
 # VERİ YÖNETİMİ
 # ============================================================
 async def load_data_to_memory():
-    files_map = {"history": HISTORY_FILE, "last_seen": LAST_SEEN_FILE,
-                 "api_cache": CACHE_FILE, "tokens": TOKENS_FILE}
+    # History lazy yuklenir (history_store); burada yalnizca yardimci dosyalar var.
+    # Arka planda calisir, before_serving'i bekletmez.
+    global AUX_LOADED
+    files_map = {"last_seen": LAST_SEEN_FILE, "api_cache": CACHE_FILE, "tokens": TOKENS_FILE}
     for key, fn in files_map.items():
         if os.path.exists(fn):
             async with aiofiles.open(fn, mode='r', encoding='utf-8') as f:
                 content = await f.read()
                 if content:
                     try:
-                        GLOBAL_CACHE[key] = json.loads(content)
+                        GLOBAL_CACHE[key] = loads(content)
                     except Exception:
                         GLOBAL_CACHE[key] = [] if key == "tokens" else {}
         else:
             GLOBAL_CACHE[key] = [] if key == "tokens" else {}
-
-
-async def load_shared_chats():
-    global SHARED_CHATS
-    if os.path.exists(SHARED_CHATS_FILE):
-        async with aiofiles.open(SHARED_CHATS_FILE, 'r', encoding='utf-8') as f:
-            content = await f.read()
-            if content:
-                try:
-                    SHARED_CHATS = json.loads(content)
-                    print(f"[OK] {len(SHARED_CHATS)} paylasilan sohbet yuklendi.")
-                except Exception:
-                    SHARED_CHATS = {}
-
-
-async def save_shared_chats():
-    try:
-        tmp = SHARED_CHATS_FILE + ".tmp"
-        async with aiofiles.open(tmp, 'w', encoding='utf-8') as f:
-            await f.write(json.dumps(SHARED_CHATS, ensure_ascii=False, indent=2))
-        os.replace(tmp, SHARED_CHATS_FILE)
-    except Exception as e:
-        print(f"[!] Shared chats kayit hatasi: {e}")
+    AUX_LOADED = True
 
 
 async def background_save_worker():
@@ -113,15 +108,24 @@ async def background_save_worker():
         await save_memory_to_disk()
 
 
+async def history_flush_worker():
+    while True:
+        await asyncio.sleep(HISTORY_FLUSH_SECS)
+        await history_store.flush()
+
+
 async def save_memory_to_disk(force=False):
-    files_map = {"history": HISTORY_FILE, "last_seen": LAST_SEEN_FILE,
-                 "api_cache": CACHE_FILE, "tokens": TOKENS_FILE}
+    if not AUX_LOADED:
+        # yukleme bitmeden yazarsak diskteki veriyi bos dict ile ezeriz
+        return
+    files_map = {"last_seen": LAST_SEEN_FILE, "api_cache": CACHE_FILE, "tokens": TOKENS_FILE}
     for key, fn in files_map.items():
         if DIRTY_FLAGS[key] or force:
             try:
                 tmp = fn + ".tmp"
+                content = await dumps_async(GLOBAL_CACHE[key])
                 async with aiofiles.open(tmp, mode='w', encoding='utf-8') as f:
-                    await f.write(json.dumps(GLOBAL_CACHE[key], ensure_ascii=False, indent=2))
+                    await f.write(content)
                 os.replace(tmp, fn)
                 DIRTY_FLAGS[key] = False
             except Exception as e:
@@ -135,7 +139,7 @@ async def save_memory_to_disk(force=False):
 @app.route("/")
 async def home():
     return (f"Nova 5.0 — {get_nova_date()} | 17 kaynak aktif ✅ | "
-            f"Cache: {len(resp_cache_inst)} | Paylaşımlar: {len(SHARED_CHATS)}")
+            f"Cache: {len(resp_cache_inst)} | Paylaşımlar: {len(share_store)}")
 
 
 @app.route("/.well-known/assetlinks.json", methods=["GET"])
@@ -152,7 +156,7 @@ async def assetlinks():
             },
         }
     ]
-    return Response(json.dumps(data), mimetype="application/json")
+    return Response(dumps(data), mimetype="application/json")
 
 
 @app.route("/api/min_version", methods=["GET"])
@@ -193,22 +197,19 @@ async def chat():
         custom    = data.get("systemInstruction") or data.get("systemPrompt", "")
         stream    = data.get("stream", False)
 
-        history = GLOBAL_CACHE["history"].setdefault(user_id, {}).setdefault(chat_id, [])
+        history = (await history_store.chats(user_id)).get(chat_id, [])
 
         if stream or request.headers.get("Accept") == "text/event-stream":
             async def generate():
-                full_resp = ""
-                async for chunk in gemma_cevap_stream(user_msg, history, session, user_id, image_b64, custom):
-                    if chunk.startswith("__STATUS__:"):
-                        yield f"data: {json.dumps({'type': 'status', 'text': chunk[11:]}, ensure_ascii=False)}\n\n"
-                    elif chunk:
-                        full_resp += chunk
-                        yield f"data: {json.dumps({'type': 'token', 'text': chunk}, ensure_ascii=False)}\n\n"
-
-                if full_resp:
-                    history.append({"sender": "user", "message": user_msg})
-                    history.append({"sender": "nova", "message": full_resp})
-                    DIRTY_FLAGS["history"] = True
+                relay = StreamRelay(gemma_cevap_stream(user_msg, history, session, user_id, image_b64, custom))
+                async for kind, text in relay.frames():
+                    yield f"data: {dumps({'type': kind, 'text': text})}\n\n"
+
+                full_resp = relay.text
+                if full_resp and not relay.stalled:
+                    await history_store.append(user_id, chat_id,
+                                               {"sender": "user", "message": user_msg},
+                                               {"sender": "nova", "message": full_resp})
                 yield "data: [DONE]\n\n"
 
             return Response(generate(), mimetype="text/event-stream")
@@ -218,9 +219,9 @@ async def chat():
         if not response or response.startswith("⚠️"):
             return jsonify({"response": response or "Bir hata olustu.", "status": "error"}), 200
 
-        history.append({"sender": "user", "message": user_msg})
-        history.append({"sender": "nova", "message": response})
-        DIRTY_FLAGS["history"] = True
+        await history_store.append(user_id, chat_id,
+                                   {"sender": "user", "message": user_msg},
+                                   {"sender": "nova", "message": response})
 
         return jsonify({
             "response": response,
@@ -242,10 +243,7 @@ async def delete_chat():
         chat_id = data.get("chatId")
         if not chat_id:
             return jsonify({"success": False, "error": "chatId gerekli"}), 400
-        chats = GLOBAL_CACHE["history"].get(user_id, {})
-        if chat_id in chats:
-            del chats[chat_id]
-            DIRTY_FLAGS["history"] = True
+        await history_store.delete_chat(user_id, chat_id)
         return jsonify({"success": True}), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -254,7 +252,7 @@ async def delete_chat():
 @app.route("/api/history", methods=["GET"])
 async def get_history():
     user_id = request.args.get("userId", "anon")
-    return jsonify(GLOBAL_CACHE["history"].get(user_id, {})), 200
+    return jsonify(await history_store.chats(user_id)), 200
 
 
 @app.route("/api/share_chat", methods=["POST"])
@@ -275,8 +273,7 @@ async def share_chat_api():
             "view_count": 0,
         }
 
-        SHARED_CHATS[share_id] = shared_data
-        asyncio.create_task(save_shared_chats())
+        share_store.create(share_id, shared_data)
 
         return jsonify({
             "success": True,
@@ -294,7 +291,7 @@ async def share_chat_api():
 @app.route("/share/<share_id>", methods=["GET"])
 async def view_shared_chat(share_id):
     share_id = share_id.upper()
-    data = SHARED_CHATS.get(share_id)
+    data = share_store.get(share_id)
 
     if not data:
         accept = request.headers.get("Accept", "")
@@ -302,14 +299,24 @@ async def view_shared_chat(share_id):
             return jsonify({"error": "Sohbet bulunamadı veya süresi doldu."}), 404
         return "<h2 style='font-family:sans-serif;text-align:center;margin-top:60px'>Sohbet bulunamadı veya 30 günlük süresi doldu 😔</h2>", 404
 
-    data["view_count"] = data.get("view_count", 0) + 1
-    asyncio.create_task(save_shared_chats())
+    share_store.record_view(share_id)
 
     accept = request.headers.get("Accept", "")
     if "application/json" in accept:
         return jsonify(data), 200
 
-    return Response(templates.shared_chat_html(share_id, data), mimetype="text/html")
+    page = render_shared_chat(share_id, data)
+    headers = {
+        "ETag": page.etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": f"public, max-age={SHARE_RENDER_TTL_SECS}",
+    }
+    if etag_matches(request.headers.get("If-None-Match"), page.etag):
+        return Response(b"", status=304, headers=headers)
+    body, encoding = page.encoded(request.headers.get("Accept-Encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, headers=headers, mimetype="text/html")
 
 
 @app.route("/join/<room_code>", methods=["GET"])
@@ -320,7 +327,7 @@ async def join_room(room_code):
 
 @app.route("/api/debug/search")
 async def debug_search():
-    from cache import _search_cache as sc
+    from cache import _search_cache as sc, cache_stats
     from scrapers import fetch_live_data_full
     q = request.args.get("q", "dolar kaç")
     result = await fetch_live_data_full(q, session)
@@ -329,7 +336,29 @@ async def debug_search():
         "result": result,
         "search_cache": len(sc),
         "resp_cache": len(resp_cache_inst),
-        "shared_chats": len(SHARED_CHATS),
+        "cache_stats": cache_stats(),
+        "shared_chats": len(share_store),
+    })
+
+
+@app.route("/api/debug/metrics")
+async def debug_metrics():
+    import metrics
+    from cache import cache_stats
+    from gemini import hedge_stats, prompt_cache
+    from keypool import key_pool
+    from limiter import limiter_stats
+    from scrapers.feeds import feed_index
+    from scrapers.market import market_data
+    return jsonify({
+        "metrics": metrics.snapshot(),
+        "hedge": hedge_stats(),
+        "keys": key_pool.stats(),
+        "limiters": limiter_stats(),
+        "prompt_cache": prompt_cache.stats(),
+        "cache_stats": cache_stats(),
+        "feeds": feed_index.stats(),
+        "market": market_data.stats(),
     })
 
 
@@ -344,29 +373,26 @@ async def ws_chat_handler():
             raw = await websocket.receive()
             if not raw:
                 break
-            msg = json.loads(raw)
+            msg = loads(raw)
             user_id   = msg.get("userId", "anon")
             chat_id   = msg.get("chatId", "live")
             user_msg  = msg.get("message", "")
             image_b64 = msg.get("image")
             custom    = msg.get("systemInstruction") or msg.get("systemPrompt", "")
 
-            history = GLOBAL_CACHE["history"].setdefault(user_id, {}).setdefault(chat_id, [])
+            history = (await history_store.chats(user_id)).get(chat_id, [])
 
-            full_resp = ""
-            async for chunk in gemma_cevap_stream(user_msg, history, session, user_id, image_b64, custom):
-                if chunk.startswith("__STATUS__:"):
-                    await websocket.send(json.dumps({"type": "status", "text": chunk[11:]}, ensure_ascii=False))
-                elif chunk:
-                    full_resp += chunk
-                    await websocket.send(json.dumps({"type": "token", "text": chunk}, ensure_ascii=False))
+            relay = StreamRelay(gemma_cevap_stream(user_msg, history, session, user_id, image_b64, custom))
+            async for kind, text in relay.frames():
+                await websocket.send(dumps({"type": kind, "text": text}))
 
             await websocket.send("[END]")
 
-            if full_resp and not full_resp.startswith("[!]"):
-                history.append({"sender": "user", "message": user_msg})
-                history.append({"sender": "nova", "message": full_resp})
-                DIRTY_FLAGS["history"] = True
+            full_resp = relay.text
+            if full_resp and not full_resp.startswith("[!]") and not relay.stalled:
+                await history_store.append(user_id, chat_id,
+                                           {"sender": "user", "message": user_msg},
+                                           {"sender": "nova", "message": full_resp})
 
         except Exception as e:
             print(f"[WS-ERR]: {e}")
@@ -0,0 +1,89 @@
+import asyncio
+
+import metrics
+
+# ============================================================
+# ISTEK BIRLESTIRICI (DATALOADER)
+# ============================================================
+# Eszamanli sorgularin istedigi anahtarlar (sembol, coin id) kisa bir pencere
+# boyunca toplanir ve saglayiciya tek coklu-sembol istegi olarak gider; sonuc
+# anahtar basina bekleyenlere dagitilir. Ayni anahtar beklemede ya da yolda
+# ise yeni istek acilmaz, mevcut future paylasilir. Pencere dolmadan
+# max_batch anahtara ulasilirsa hemen gonderilir.
+
+
+class Batcher:
+    def __init__(self, name, fetch_many, window, max_batch):
+        # fetch_many(keys, ctx) -> {key: deger}; eksik anahtarlar None doner
+        self.name = name
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict = {}
+        self._inflight: dict = {}
+        self._ctx = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.keys = 0
+        self.shared = 0
+
+    def load(self, key, ctx=None) -> asyncio.Future:
+        fut = self._pending.get(key) or self._inflight.get(key)
+        if fut is not None:
+            self.shared += 1
+            return fut
+        loop = asyncio.get_running_loop()
+        fut = self._pending[key] = loop.create_future()
+        self._ctx = ctx
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return fut
+
+    async def load_many(self, keys, ctx=None) -> dict:
+        futs = {k: self.load(k, ctx) for k in dict.fromkeys(keys)}
+        # shield: bir cagiranin iptali ortak future'i iptal etmez
+        values = await asyncio.gather(*[asyncio.shield(f) for f in futs.values()])
+        return {k: v for k, v in zip(futs, values) if v is not None}
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        self._inflight.update(batch)
+        task = asyncio.create_task(self._run(batch, self._ctx))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict, ctx):
+        self.batches += 1
+        self.keys += len(batch)
+        metrics.observe(f"batch.{self.name}.size", len(batch))
+        try:
+            found = await self.fetch_many(list(batch), ctx) or {}
+        except asyncio.CancelledError:
+            for fut in batch.values():
+                fut.cancel()
+            raise
+        except Exception as e:
+            print(f"[BATCH] {self.name} hata: {e}")
+            found = {}
+        finally:
+            for k in batch:
+                self._inflight.pop(k, None)
+        for k, fut in batch.items():
+            if not fut.done():
+                fut.set_result(found.get(k))
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "keys": self.keys,
+            "shared": self.shared,
+            "avg_batch": round(self.keys / self.batches, 2) if self.batches else 0,
+        }
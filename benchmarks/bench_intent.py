@@ -0,0 +1,85 @@
+"""Intent router vs. the previous per-pattern regex loops.
+
+    python -m benchmarks.bench_intent
+"""
+import re
+import timeit
+from datetime import datetime, timezone, timedelta
+
+from config import SCRAPER_RULES, DEFAULT_SCRAPERS, MUST_SEARCH, NO_SEARCH
+from intent import classify
+
+MESSAGES = [
+    "dolar kaç", "bugün euro ne kadar", "Fenerbahçe maçı kaç kaç bitti",
+    "süper lig puan durumu", "istanbul hava durumu nasıl", "son dakika deprem var mı",
+    "python'da liste nasıl sıralanır", "bana bir şiir yaz", "bitcoin şu an kaç dolar",
+    "ankara iftar saati", "saat kaç", "thyao hisse bugün", "enflasyon son açıklandı mı",
+    "atatürk kimdir", "şu an türkiye'nin cumhurbaşkanı kim", "merhaba nasılsın",
+    "integral nasıl hesaplanır", "gram altın fiyatı", "galatasaray transfer haberi",
+    "bugün gündemde ne var",
+]
+
+
+# ---- eski uygulama (karsilastirma icin birebir kopya) ----
+def _legacy_optimize_query(original, msg):
+    today = datetime.now(timezone(timedelta(hours=3))).strftime("%d.%m.%Y")
+    teams = ["fenerbahçe", "galatasaray", "beşiktaş", "trabzonspor", "başakşehir",
+             "sivasspor", "konyaspor", "antalyaspor", "alanyaspor"]
+    for team in teams:
+        if team in msg:
+            return f"{team} son maç sonucu {today}"
+    if re.search(r"(puan\s*durumu|puan\s*tablosu)", msg): return f"süper lig puan durumu {today}"
+    if re.search(r"(dolar|usd)", msg):                    return f"dolar TL kuru anlık {today}"
+    if re.search(r"(euro|eur)", msg):                     return f"euro TL kuru anlık {today}"
+    if re.search(r"(altın|gram\s*altın)", msg):           return f"gram altın fiyatı {today}"
+    if re.search(r"(bitcoin|btc)", msg):                  return "bitcoin fiyatı usd try bugün"
+    if "saat kaç" in msg:                                 return "türkiye saat"
+    if re.search(r"(son\s*dakika|haber)", msg):           return f"{original} {today}"
+    return original
+
+
+def _legacy_should_search(message):
+    msg = message.lower().strip()
+    for pat in NO_SEARCH:
+        if re.search(pat, msg):
+            return False, ""
+    for pat in MUST_SEARCH:
+        if re.search(pat, msg):
+            return True, _legacy_optimize_query(message, msg)
+    return False, ""
+
+
+def _legacy_select(query):
+    msg = query.lower()
+    selected = set(DEFAULT_SCRAPERS)
+    for pattern, scrapers in SCRAPER_RULES:
+        if re.search(pattern, msg):
+            selected.update(scrapers)
+    return selected
+
+
+def legacy(message):
+    needed, q = _legacy_should_search(message)
+    if not needed:
+        return False, "", set()
+    q = q or message
+    return True, q, _legacy_select(q)
+
+
+def current(message):
+    intent = classify(message)
+    return intent.search, intent.query, set(intent.scrapers)
+
+
+def main():
+    for m in MESSAGES:
+        assert legacy(m) == current(m), (m, legacy(m), current(m))
+    n = 2000
+    for name, fn in (("legacy", legacy), ("intent", current)):
+        t = timeit.timeit(lambda: [fn(m) for m in MESSAGES], number=n)
+        per = t / (n * len(MESSAGES)) * 1e6
+        print(f"{name:8s} {per:7.2f} us/mesaj")
+
+
+if __name__ == "__main__":
+    main()
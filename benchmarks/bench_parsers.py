@@ -0,0 +1,180 @@
+"""scrapers.parsers vs. the previous per-call re.findall + 8-step clean_html.
+
+    python -m benchmarks.bench_parsers
+"""
+import random
+import re
+import timeit
+
+from scrapers import parsers
+from utils import clean_html
+
+WORDS = ("Fenerbahçe", "Galatasaray", "deprem", "İstanbul'da", "dolar", "&amp;", "&quot;alıntı&quot;",
+         "<b>son</b>", "dakika", "ekonomi", "&#39;", "Ankara", "seçim", "&nbsp;", "yağmur", "borsa")
+
+
+def _text(rng, lo=6, hi=18):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+# ---- sentetik sayfalar (gercek sayfalarin iskeletine benzer) ----
+def _rss(rng, items=60):
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+           '<title>Son Dakika</title><link>https://example.com/</link>']
+    for i in range(items):
+        out.append(
+            f"<item><title><![CDATA[{_text(rng).replace('&nbsp;', '')}]]></title>"
+            f"<link>https://example.com/haber/{i}</link>"
+            f"<description><![CDATA[<p>{_text(rng, 30, 60)}</p><img src=\"x.jpg\"/>]]></description>"
+            f"<pubDate>Sat, 17 Oct 2026 {i % 24:02d}:{i % 60:02d}:00 +0300</pubDate></item>\n")
+    out.append("</channel></rss>")
+    return "".join(out)
+
+
+def _padding(rng, n):
+    return "".join(f'<div class="nav-{i}"><a href="/x/{i}">{_text(rng, 2, 5)}</a></div>\n' for i in range(n))
+
+
+def _bing(rng):
+    blocks = "".join(
+        f'<li class="b_algo"><h2><a href="https://e.com/{i}">{_text(rng, 3, 8)}</a></h2>'
+        f'<div class="b_caption"><p>{_text(rng, 20, 40)}</p></div></li>' for i in range(10))
+    return f"<html><body>{_padding(rng, 300)}<ol id=\"b_results\">{blocks}</ol>{_padding(rng, 600)}</body></html>"
+
+
+def _ddg(rng):
+    res = "".join(
+        f'<div class="result"><a class="result__a" href="/l/{i}">{_text(rng, 3, 8)}</a>'
+        f'<a class="result__snippet" href="/l/{i}">{_text(rng, 20, 40)}</a></div>' for i in range(25))
+    return f"<html>{_padding(rng, 100)}{res}{_padding(rng, 400)}</html>"
+
+
+def _flashscore(rng):
+    ev = "".join(
+        f'<div class="event__match event__match--static">'
+        f'<span class="event__participant--home">{rng.choice(WORDS[:2])}</span>'
+        f'<span class="event__score">{rng.randint(0, 4)}-{rng.randint(0, 4)}</span>'
+        f'<span class="event__participant--away">{rng.choice(WORDS[:2])}</span></div>' for _ in range(120))
+    return f"<html>{_padding(rng, 200)}{ev}{_padding(rng, 400)}</html>"
+
+
+def _mackolik_table(rng):
+    rows = "".join("<tr>" + "".join(f"<td><span>{_text(rng, 1, 2)}</span></td>" for _ in range(9)) + "</tr>"
+                   for _ in range(40))
+    return f"<html>{_padding(rng, 300)}<table>{rows}</table>{_padding(rng, 300)}</html>"
+
+
+def _kandilli(rng):
+    lines = "\n".join(f"2026.10.17 {i % 24:02d}:{i % 60:02d}:11  39.{i:04d}   28.1234   7.0  -.-  {rng.randint(10, 50) / 10}  -.-  "
+                      f"SINDIRGI-BALIKESIR  Ilksel" for i in range(500))
+    return f"<html><body><pre>Tarih Saat Enlem Boylam\n{lines}\n</pre></body></html>"
+
+
+# ---- eski uygulamalar (scraper'lardaki dongulerin birebir kopyasi) ----
+def legacy_clean_html(text):
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = re.sub(r'&amp;', '&', text)
+    text = re.sub(r'&lt;', '<', text)
+    text = re.sub(r'&gt;', '>', text)
+    text = re.sub(r'&quot;', '"', text)
+    text = re.sub(r'&#\d+;', '', text)
+    text = re.sub(r'&[a-z]+;', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_rss(xml):
+    out = []
+    items = re.findall(r'<item>(.*?)</item>', xml, re.DOTALL)
+    for item in items[:10]:
+        title_m = re.search(r'<title>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</title>', item, re.DOTALL)
+        desc_m = re.search(r'<description>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</description>', item, re.DOTALL)
+        pubdate_m = re.search(r'<pubDate>(.*?)</pubDate>', item)
+        title = legacy_clean_html(title_m.group(1)) if title_m else ""
+        desc = legacy_clean_html(desc_m.group(1))[:150] if desc_m else ""
+        pubdate = pubdate_m.group(1).strip()[:16] if pubdate_m else ""
+        out.append((title, desc, pubdate))
+    return out
+
+
+def current_rss(xml):
+    return [(it["title"], it["desc"][:150], it["pubdate"][:16]) for it in parsers.parse_feed(xml, 10)]
+
+
+def legacy_bing(html):
+    out = []
+    blocks = re.findall(r'<li[^>]*class="b_algo"[^>]*>(.*?)</li>', html, re.DOTALL)
+    for block in blocks[:6]:
+        h2 = re.search(r'<h2[^>]*>(.*?)</h2>', block, re.DOTALL)
+        p = re.search(r'<p[^>]*>(.*?)</p>', block, re.DOTALL)
+        if p:
+            out.append((legacy_clean_html(h2.group(1)) if h2 else "", legacy_clean_html(p.group(1))))
+    return out
+
+
+def legacy_ddg(html):
+    titles = re.findall(r'class="result__a"[^>]*>(.*?)</a>', html, re.DOTALL)
+    snippets = re.findall(r'class="result__snippet"[^>]*>(.*?)</a>', html, re.DOTALL)
+    return [(legacy_clean_html(t), legacy_clean_html(s)) for t, s in zip(titles[:7], snippets[:7])]
+
+
+def legacy_flashscore(html):
+    out = []
+    blocks = re.findall(r'class="[^"]*event__match[^"]*"[^>]*>(.*?)</div>', html, re.DOTALL)
+    for block in blocks[:15]:
+        home_m = re.search(r'class="[^"]*event__participant--home[^"]*"[^>]*>(.*?)</div>', block, re.DOTALL)
+        away_m = re.search(r'class="[^"]*event__participant--away[^"]*"[^>]*>(.*?)</div>', block, re.DOTALL)
+        score_m = re.search(r'class="[^"]*event__score[^"]*"[^>]*>(.*?)</div>', block, re.DOTALL)
+        if home_m and away_m:
+            out.append((legacy_clean_html(home_m.group(1)),
+                        legacy_clean_html(score_m.group(1)) if score_m else "-",
+                        legacy_clean_html(away_m.group(1))))
+    return out
+
+
+def legacy_table(html):
+    out = []
+    rows = re.findall(r'<tr[^>]*>(.*?)</tr>', html, re.DOTALL)
+    for row in rows[:6]:
+        out.append([legacy_clean_html(c) for c in re.findall(r'<td[^>]*>(.*?)</td>', row, re.DOTALL)
+                    if legacy_clean_html(c)])
+    return out
+
+
+def legacy_kandilli(html):
+    rows = re.findall(r'<pre[^>]*>(.*?)</pre>', html, re.DOTALL)
+    return [line.split() for line in rows[0].strip().split('\n')[1:6]]
+
+
+def main():
+    rng = random.Random(21)
+    cases = {
+        "rss": (_rss(rng), legacy_rss, current_rss),
+        "bing": (_bing(rng), legacy_bing, parsers.parse_bing),
+        "ddg_html": (_ddg(rng), legacy_ddg, parsers.parse_ddg_html),
+        "flashscore": (_flashscore(rng), legacy_flashscore, parsers.parse_flashscore),
+        "mackolik_tablo": (_mackolik_table(rng), legacy_table, parsers.parse_mackolik_table),
+        "kandilli": (_kandilli(rng), legacy_kandilli, parsers.parse_kandilli),
+    }
+    total_old = total_new = 0.0
+    for name, (page, old, new) in cases.items():
+        assert old(page) == new(page), name
+        n = 200
+        t_old = timeit.timeit(lambda: old(page), number=n) / n
+        t_new = timeit.timeit(lambda: new(page), number=n) / n
+        total_old += t_old
+        total_new += t_new
+        print(f"{name:15s} {len(page) / 1024:6.0f} KB  eski {t_old * 1e6:8.1f} us  "
+              f"yeni {t_new * 1e6:8.1f} us  ({t_old / t_new:4.1f}x)")
+    print(f"{'toplam':15s} {'':9s} eski {total_old * 1e6:8.1f} us  yeni {total_new * 1e6:8.1f} us")
+
+    text = _text(rng, 400, 400)
+    assert legacy_clean_html(text) == clean_html(text)
+    n = 2000
+    t_old = timeit.timeit(lambda: legacy_clean_html(text), number=n) / n
+    t_new = timeit.timeit(lambda: clean_html(text), number=n) / n
+    print(f"clean_html      {len(text) / 1024:6.1f} KB  eski {t_old * 1e6:8.1f} us  yeni {t_new * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
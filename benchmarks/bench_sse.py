@@ -0,0 +1,109 @@
+"""SSEDecoder vs. the previous str buffer + split("\\n", 1) loop.
+
+    python -m benchmarks.bench_sse
+"""
+import random
+import timeit
+
+from serialization import BACKEND, dumps, loads, loads_bytes
+from sse import SSEDecoder, _DONE
+
+WORDS = ("merhaba", "bugün", "hava", "İstanbul'da", "güneşli", "görünüyor", "🙂",
+         "dolar", "kuru", "şu", "an", "yaklaşık", "ve", "yarın", "yağmur", "bekleniyor")
+
+
+def _gemini_stream(events: int, rng: random.Random) -> bytes:
+    out = []
+    for i in range(events):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+        ev = {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}],
+            "usageMetadata": {"promptTokenCount": 812, "candidatesTokenCount": i, "totalTokenCount": 812 + i},
+            "modelVersion": "gemini-2.5-flash-lite",
+        }
+        out.append(f"data: {dumps(ev)}\r\n\r\n")
+    return "".join(out).encode("utf-8")
+
+
+def _deepseek_stream(events: int, rng: random.Random) -> bytes:
+    out = []
+    for i in range(events):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        ev = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 1700000000,
+              "model": "deepseek-chat", "choices": [{"index": 0, "delta": {"content": text}}]}
+        out.append(f"data: {dumps(ev)}\n\n")
+    out.append("data: [DONE]\n\n")
+    return "".join(out).encode("utf-8")
+
+
+def _chunks(raw: bytes, rng: random.Random, lo=512, hi=4096) -> list[bytes]:
+    out, i = [], 0
+    while i < len(raw):
+        n = rng.randint(lo, hi)
+        out.append(raw[i:i + n])
+        i += n
+    return out
+
+
+# ---- eski uygulama (gemini.py'deki dongunun birebir kopyasi) ----
+def legacy(parts) -> int:
+    n = 0
+    buffer = ""
+    for line_bytes in parts:
+        line = line_bytes.decode('utf-8', errors='replace')
+        buffer += line
+        while "\n" in buffer:
+            current_line, buffer = buffer.split("\n", 1)
+            current_line = current_line.strip()
+            if current_line == "data: [DONE]":
+                return n
+            if not current_line.startswith("data:"):
+                continue
+            raw_json = current_line[5:].strip()
+            if not raw_json:
+                continue
+            try:
+                loads(raw_json)
+                n += 1
+            except Exception:
+                pass
+    return n
+
+
+def current(parts) -> int:
+    n = 0
+    dec = SSEDecoder()
+    for chunk in parts:
+        for payload in dec.feed(chunk):
+            if payload.rstrip() == _DONE:
+                return n
+            loads_bytes(payload)
+            n += 1
+    return n
+
+
+def main():
+    rng = random.Random(7)
+    streams = {
+        "gemini": _gemini_stream(300, rng),
+        "deepseek": _deepseek_stream(1500, rng),
+    }
+    print(f"json backend: {BACKEND}")
+    for name, raw in streams.items():
+        lines = raw.splitlines(keepends=True)
+        chunks = _chunks(raw, rng)
+        assert legacy(lines) == current(lines) == current(chunks) == legacy(chunks)
+        n = 20
+        print(f"{name}: {len(raw) / 1024:.0f} KB, {len(lines)} satir, {len(chunks)} parca")
+        for label, fn, parts in (
+            ("legacy/satir", legacy, lines),
+            ("legacy/parca", legacy, chunks),
+            ("sse/satir", current, lines),
+            ("sse/parca", current, chunks),
+        ):
+            t = timeit.timeit(lambda: fn(parts), number=n) / n
+            print(f"  {label:13s} {t * 1000:7.2f} ms/stream")
+
+
+if __name__ == "__main__":
+    main()
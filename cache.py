@@ -1,41 +1,118 @@
 import hashlib
 import time
+import zlib
+from collections import OrderedDict
+
+from config import (
+    RESP_CACHE_TTL, RESP_CACHE_MAX, RESP_CACHE_MAX_BYTES,
+    SEARCH_CACHE_TTL, SEARCH_CACHE_MAX, SEARCH_CACHE_MAX_BYTES,
+    UPSTREAM_CACHE_TTLS, UPSTREAM_CACHE_TTL_DEFAULT, UPSTREAM_CACHE_MAX, UPSTREAM_CACHE_MAX_BYTES,
+    CACHE_SWEEP_INTERVAL_SECS, is_cacheable,
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX, SEMANTIC_CACHE_MIN_TERMS,
+)
+from textnorm import signature
+import metrics
 
-from config import RESP_CACHE_TTL, RESP_CACHE_MAX, SEARCH_CACHE_TTL, is_cacheable
 
 class _TTLCache:
-    def __init__(self, ttl, max_size=None):
-        self._store: dict[str, tuple[str, float]] = {}
+    # _store: LRU sirasi (en eski basta), _expiry: yazim sirasi. TTL sabit oldugu
+    # icin yazim sirasi = sona erme sirasi; sweep bastan O(suresi dolan) calisir.
+    def __init__(self, ttl, max_size=None, max_bytes=None, sweep_interval=CACHE_SWEEP_INTERVAL_SECS,
+                 fold_case=True):
+        self._store: OrderedDict[str, tuple[str, float, int]] = OrderedDict()
+        self._expiry: OrderedDict[str, float] = OrderedDict()
         self.ttl = ttl
         self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.fold_case = fold_case
+        self._bytes = 0
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def _key(self, text: str) -> str:
-        return hashlib.md5(text.strip().lower().encode()).hexdigest()
+        text = text.strip()
+        if self.fold_case:
+            text = text.lower()
+        return hashlib.md5(text.encode()).hexdigest()
+
+    def _drop(self, k: str):
+        _, _, size = self._store.pop(k)
+        self._expiry.pop(k, None)
+        self._bytes -= size
+
+    def _sweep(self, now: float):
+        while self._expiry:
+            k, exp = next(iter(self._expiry.items()))
+            if exp > now:
+                break
+            self._drop(k)
+            self.expirations += 1
+        self._next_sweep = now + self.sweep_interval
 
     def get(self, text: str) -> str | None:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
         k = self._key(text)
-        if k in self._store:
-            val, ts = self._store[k]
-            if time.time() - ts < self.ttl:
+        entry = self._store.get(k)
+        if entry is not None:
+            val, exp, _ = entry
+            if now < exp:
+                self._store.move_to_end(k)
+                self.hits += 1
                 return val
-            del self._store[k]
+            self._drop(k)
+            self.expirations += 1
+        self.misses += 1
         return None
 
     def set(self, text: str, value: str):
-        if self.max_size and len(self._store) >= self.max_size:
-            oldest = min(self._store, key=lambda k: self._store[k][1])
-            del self._store[oldest]
-        self._store[self._key(text)] = (value, time.time())
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        k = self._key(text)
+        if k in self._store:
+            self._drop(k)
+        size = len(value.encode("utf-8"))
+        if self.max_bytes and size > self.max_bytes:
+            return
+        exp = now + self.ttl
+        self._store[k] = (value, exp, size)
+        self._expiry[k] = exp
+        self._bytes += size
+        while ((self.max_size and len(self._store) > self.max_size)
+               or (self.max_bytes and self._bytes > self.max_bytes)):
+            oldest = next(iter(self._store))
+            self._drop(oldest)
+            self.evictions += 1
 
     def clear(self):
         self._store.clear()
+        self._expiry.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._store),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
 
     def __len__(self):
         return len(self._store)
 
 
-_resp_cache = _TTLCache(ttl=RESP_CACHE_TTL, max_size=RESP_CACHE_MAX)
-_search_cache = _TTLCache(ttl=SEARCH_CACHE_TTL, max_size=None)
+_resp_cache = _TTLCache(ttl=RESP_CACHE_TTL, max_size=RESP_CACHE_MAX, max_bytes=RESP_CACHE_MAX_BYTES)
+_search_cache = _TTLCache(ttl=SEARCH_CACHE_TTL, max_size=SEARCH_CACHE_MAX, max_bytes=SEARCH_CACHE_MAX_BYTES)
 
 
 def resp_cache_get(msg: str) -> str | None:
@@ -52,3 +129,161 @@ def cache_get(query: str) -> str | None:
 
 def cache_set(query: str, result: str):
     _search_cache.set(query, result)
+
+
+# ============================================================
+# SEMANTIK YANIT CACHE'I (MinHash + LSH)
+# ============================================================
+# Birebir ayni olmayan ama ayni seyi soran mesajlar icin ikinci kademe.
+# Mesaj -> textnorm.signature: sirali kok n-gram kumesi + birebir eslesmesi
+# gereken sayi/operator/olumsuzluk dizisi. n-gram kumesinin MinHash imzasi
+# _BANDS x _ROWS bantlara bolunup kovalara yazilir. Ayni kovaya dusen ve exact
+# dizisi ayni olan adaylar icin gercek Jaccard hesaplanir, esigi gecen en
+# benzer yanit dondurulur. Yalnizca is_cacheable, gorselsiz, ek talimatsiz,
+# gecmissiz ve web aramasi gerektirmeyen mesajlar icin kullanilir.
+_BANDS, _ROWS = 16, 4
+_PRIME = (1 << 61) - 1
+_PERMS = [((i * 0x9E3779B1 + 1) % _PRIME | 1, (i * 0x85EBCA77 + 7) % _PRIME)
+          for i in range(_BANDS * _ROWS)]
+
+
+def _minhash(terms) -> list[int]:
+    hashes = [zlib.crc32(t.encode()) for t in terms]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+class _SemanticCache:
+    def __init__(self, ttl, max_size, threshold, min_terms):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.threshold = threshold
+        self.min_terms = min_terms
+        # (exact, shingles) -> (yanit, bitis, bant anahtarlari); LRU sirasi
+        self._entries: OrderedDict[tuple, tuple[str, float, list]] = OrderedDict()
+        self._buckets: dict[tuple, set] = {}
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _bands(sig) -> list[tuple]:
+        return [(b, *sig[b * _ROWS:(b + 1) * _ROWS]) for b in range(_BANDS)]
+
+    def _key(self, text: str) -> tuple | None:
+        sig = signature(text)
+        if sig is None or sig[2] < self.min_terms:
+            return None
+        shingles, exact, _ = sig
+        return exact, shingles
+
+    @classmethod
+    def _key_bands(cls, key) -> list[tuple]:
+        exact, shingles = key
+        return cls._bands(_minhash(shingles.union(exact)))
+
+    def _drop(self, key):
+        _, _, bands = self._entries.pop(key)
+        for band in bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def get(self, text: str) -> str | None:
+        key = self._key(text)
+        if key is None:
+            self.skipped += 1
+            return None
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        best, best_sim = (key, 1.0) if entry else (None, 0.0)
+        if best is None:
+            exact, terms = key
+            candidates = set()
+            for band in self._key_bands(key):
+                candidates.update(self._buckets.get(band, ()))
+            for cand in candidates:
+                # sayi, operator ve olumsuzluk sirasiyla ayni olmali
+                if cand[0] != exact:
+                    continue
+                sim = len(terms & cand[1]) / len(terms | cand[1])
+                if sim > best_sim:
+                    best, best_sim = cand, sim
+        if best is not None and best_sim >= self.threshold:
+            val, exp, _ = self._entries[best]
+            if now < exp:
+                self._entries.move_to_end(best)
+                self.hits += 1
+                metrics.observe("cache.semantic_similarity", best_sim)
+                return val
+            self._drop(best)
+        self.misses += 1
+        return None
+
+    def set(self, text: str, value: str):
+        key = self._key(text)
+        if key is None:
+            return
+        if key in self._entries:
+            self._drop(key)
+        bands = self._key_bands(key)
+        self._entries[key] = (value, time.monotonic() + self.ttl, bands)
+        for band in bands:
+            self._buckets.setdefault(band, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "buckets": len(self._buckets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "threshold": self.threshold,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_semantic_cache = _SemanticCache(RESP_CACHE_TTL, SEMANTIC_CACHE_MAX, SEMANTIC_CACHE_THRESHOLD,
+                                 SEMANTIC_CACHE_MIN_TERMS)
+
+
+def semantic_cache_get(msg: str) -> str | None:
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    return _semantic_cache.get(msg)
+
+
+def semantic_cache_set(msg: str, response: str):
+    if SEMANTIC_CACHE_ENABLED:
+        _semantic_cache.set(msg, response)
+
+
+# ============================================================
+# UPSTREAM (URL) CACHE — kaynak basina ayri TTL
+# ============================================================
+_upstream_caches: dict[str, _TTLCache] = {}
+
+
+def upstream_cache(source: str) -> _TTLCache:
+    c = _upstream_caches.get(source)
+    if c is None:
+        c = _TTLCache(ttl=UPSTREAM_CACHE_TTLS.get(source, UPSTREAM_CACHE_TTL_DEFAULT),
+                      max_size=UPSTREAM_CACHE_MAX, max_bytes=UPSTREAM_CACHE_MAX_BYTES, fold_case=False)
+        _upstream_caches[source] = c
+    return c
+
+
+def cache_stats() -> dict:
+    return {
+        "resp": _resp_cache.stats(),
+        "search": _search_cache.stats(),
+        "semantic": _semantic_cache.stats(),
+        "upstream": {name: c.stats() for name, c in _upstream_caches.items()},
+    }
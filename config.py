@@ -14,6 +14,19 @@ LAST_SEEN_FILE    = get_path("last_seen.json")
 CACHE_FILE        = get_path("cache.json")
 TOKENS_FILE       = get_path("tokens.json")
 SHARED_CHATS_FILE = get_path("shared_chats.json")
+HISTORY_LOG_FILE  = get_path("chat_history.log")
+HISTORY_DIR       = get_path("history")
+GAZETTEER_FILE    = get_path("gazetteer.tsv")
+
+HISTORY_SHARD_COMPACT_BYTES = 64 * 1024
+HISTORY_MAX_RESIDENT_USERS  = 2000
+HISTORY_FLUSH_SECS          = 2
+
+SHARE_SAVE_DEBOUNCE_SECS  = 2
+SHARE_VIEW_FLUSH_SECS     = 60
+SHARE_PURGE_INTERVAL_SECS = 3600
+SHARE_RENDER_TTL_SECS     = 60
+SHARE_RENDER_CACHE_MAX    = 500
 
 # ============================================================
 # API KEY'LER
@@ -41,7 +54,19 @@ GEMINI_MODEL_NAME    = "gemini-2.5-flash-lite"
 GEMINI_REST_URL_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
 MODEL_TIMEOUT_SECS   = 18
 LIVE_DATA_TIMEOUT_SECS = 8
-KEY_COOLDOWN_SECS    = 60
+
+# ============================================================
+# GEMINI KEY HAVUZU
+# ============================================================
+# Key basina dakikalik istek kotasi (token bucket) ve 429 sonrasi soguma.
+# Soguma her 429'da ikiye katlanir (taban..max), ceza yari omurle azalir.
+GEMINI_KEY_RPM            = float(os.getenv("GEMINI_KEY_RPM", "15"))
+GEMINI_KEY_BURST          = 4
+KEY_COOLDOWN_BASE_SECS    = 10
+KEY_COOLDOWN_MAX_SECS     = 300
+KEY_STRIKE_HALF_LIFE_SECS = 300
+# Tum key'ler kota/sogumadaysa en erken acilacak key en fazla bu kadar beklenir
+KEY_MAX_WAIT_SECS         = 10
 
 # ============================================================
 # DEEPSEEK AYARLARI (GEMINI_API_KEY_A slot'u kullanılır)
@@ -49,12 +74,85 @@ KEY_COOLDOWN_SECS    = 60
 DEEPSEEK_MODEL_NAME    = "deepseek-chat"
 DEEPSEEK_REST_URL      = "https://api.deepseek.com/v1/chat/completions"
 
+# ============================================================
+# MODEL ESZAMANLILIK LIMITLERI
+# ============================================================
+# (baslangic, min, max) eszamanli istek; Gemini'de key basina. Stream ve
+# unary istekler ayri havuzlardadir. Limitler AIMD ile gecikme ve 429'a gore
+# ayarlanir; yer bulamayan istek MODEL_QUEUE_DEADLINE_SECS sonra vazgecer.
+MODEL_LIMITS = {
+    "deepseek": {"unary": (8, 2, 32), "stream": (8, 2, 48)},
+    "gemini":   {"unary": (3, 1, 12), "stream": (3, 1, 12)},
+}
+MODEL_LIMIT_DEFAULT       = (4, 1, 16)
+MODEL_QUEUE_DEADLINE_SECS = 5
+LIMITER_LATENCY_FACTOR    = 3.0
+
+# ============================================================
+# STREAM CIKISI (SSE / WEBSOCKET)
+# ============================================================
+# Token'lar STREAM_FLUSH_SECS penceresinde ya da STREAM_FLUSH_CHARS karaktere
+# kadar tek frame'de birlestirilir. Istemci STREAM_STALL_SECS boyunca
+# okumazsa (kuyruk dolu) model stream'i kapatilir.
+STREAM_FLUSH_SECS  = 0.03
+STREAM_FLUSH_CHARS = 256
+STREAM_RELAY_QUEUE = 64
+STREAM_STALL_SECS  = 15
+
+# ============================================================
+# GEMINI PROMPT CACHE (cachedContents)
+# ============================================================
+# Sabit sistem talimatini key basina Gemini cachedContent olarak yukler.
+# Model/prompt minimum token sinirini karsilamazsa ilk denemede kapanir.
+GEMINI_PROMPT_CACHE             = os.getenv("GEMINI_PROMPT_CACHE", "0") == "1"
+GEMINI_PROMPT_CACHE_TTL_SECS    = 3600
+GEMINI_PROMPT_CACHE_RETRY_SECS  = 600
+
+# ============================================================
+# HEDGE AYARLARI (NON-STREAM)
+# ============================================================
+# Calisan saglayici p95 gecikme icinde yanit vermezse bir sonraki paralel
+# baslatilir. Yeterli olcum yokken varsayilan gecikme kullanilir.
+MODEL_HEDGE_DEFAULT_DELAY_SECS = 4.0
+MODEL_HEDGE_MIN_DELAY_SECS     = 1.5
+MODEL_HEDGE_MAX_DELAY_SECS     = 8.0
+MODEL_HEDGE_MAX_INFLIGHT       = 2
+
+# ============================================================
+# PIPELINE / METRIKLER
+# ============================================================
+# Genel (alan kurali eslesmeyen) arama sorularinda, web verisi beklenirken
+# paralel olarak web'siz bir yanit da uretilir; veri gelmezse o kullanilir.
+SPECULATIVE_GENERATION = os.getenv("SPECULATIVE_GENERATION", "0") == "1"
+METRICS_WINDOW = 512
+
 # ============================================================
 # CACHE AYARLARI
 # ============================================================
 RESP_CACHE_TTL  = 300
-RESP_CACHE_MAX  = 200
+RESP_CACHE_MAX  = 20000
+RESP_CACHE_MAX_BYTES = 64 * 1024 * 1024
 SEARCH_CACHE_TTL = 180
+SEARCH_CACHE_MAX = 5000
+SEARCH_CACHE_MAX_BYTES = 8 * 1024 * 1024
+CACHE_SWEEP_INTERVAL_SECS = 30
+
+# Scraper/upstream-URL seviyesi cache: farkli sorgular ayni upstream cevabini paylasir.
+UPSTREAM_CACHE_TTLS = {
+    "exchange":    60,
+    "yahoo":       60,
+    "alpha_vantage": 60,
+    "weather":     600,
+    "gnews":       120,
+    "newsapi":     300,
+    "wikipedia":   86400,
+    "ddg_instant": 600,
+    "earthquake":  60,
+    "sports":      60,
+}
+UPSTREAM_CACHE_TTL_DEFAULT = 120
+UPSTREAM_CACHE_MAX         = 2000
+UPSTREAM_CACHE_MAX_BYTES   = 16 * 1024 * 1024
 
 _NO_CACHE_RE = re.compile(
     r"(saat|bugün|şimdi|anlık|dolar|euro|bitcoin|btc|hava|fiyat|kur|"
@@ -65,6 +163,13 @@ _NO_CACHE_RE = re.compile(
 def is_cacheable(msg: str) -> bool:
     return not _NO_CACHE_RE.search(msg)
 
+# Semantik yanit cache'i: sirali kok n-gram kumeleri arasi Jaccard esigi;
+# MIN_TERMS zamir/baglac/soru kelimeleri dusuldukten sonra kalan icerik kok sayisi
+SEMANTIC_CACHE_ENABLED    = os.getenv("SEMANTIC_CACHE", "1") == "1"
+SEMANTIC_CACHE_THRESHOLD  = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))
+SEMANTIC_CACHE_MAX        = 5000
+SEMANTIC_CACHE_MIN_TERMS  = 3
+
 # ============================================================
 # USER AGENT POOL
 # ============================================================
@@ -76,6 +181,75 @@ UA_POOL = [
     "Mozilla/5.0 (iPhone; CPU iPhone OS 17_3 like Mac OS X) AppleWebKit/605.1.15 Version/17.3 Mobile/15E148 Safari/604.1",
 ]
 
+# ============================================================
+# SCRAPER TRANSPORT
+# ============================================================
+SCRAPER_POOL_LIMIT          = 100
+SCRAPER_POOL_LIMIT_PER_HOST = 8
+SCRAPER_DNS_TTL_SECS        = 300
+SCRAPER_KEEPALIVE_SECS      = 30
+SCRAPER_HOST_CONCURRENCY_DEFAULT = 4
+# host -> {"concurrency": eszamanli istek, "keepalive": False ise Connection: close}
+SCRAPER_HOST_POLICIES = {
+    "html.duckduckgo.com":     {"concurrency": 3},
+    "api.duckduckgo.com":      {"concurrency": 6},
+    "www.bing.com":            {"concurrency": 3},
+    "news.google.com":         {"concurrency": 4},
+    "www.flashscore.com.tr":   {"concurrency": 2},
+    "www.mackolik.com":        {"concurrency": 2},
+    "www.koeri.boun.edu.tr":   {"concurrency": 2, "keepalive": False},
+    "api.coingecko.com":       {"concurrency": 2},
+    "query1.finance.yahoo.com": {"concurrency": 4},
+    "open.er-api.com":         {"concurrency": 4},
+    "api.frankfurter.app":     {"concurrency": 4},
+}
+
+# ============================================================
+# PREFETCH (sicak feed'ler)
+# ============================================================
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") != "0"
+# saniye; ilgili UPSTREAM_CACHE_TTLS degerinden kisa olmali
+PREFETCH_INTERVALS = {
+    "rss":        90,
+    "sports":     45,
+    "exchange":   45,
+    "markets":    45,
+    "earthquake": 45,
+}
+
+# ============================================================
+# PIYASA VERISI (quote tablosu)
+# ============================================================
+# Prefetch "exchange"/"markets" isleri tabloyu toplu tazeler; bundan eski
+# kayitlar sorgu aninda yeniden cekilir.
+MARKET_STALE_SECS         = 180
+MARKET_YAHOO_BATCH        = 20     # spark istegi basina sembol
+MARKET_FETCH_TIMEOUT_SECS = 10
+# sorgu aninda gelen sembol isteklerini birlestirme penceresi (DataLoader)
+MARKET_BATCH_WINDOW_SECS  = 0.05
+MARKET_COINGECKO_BATCH    = 50     # simple/price istegi basina coin id
+
+# ============================================================
+# RSS BASLIK INDEKSI
+# ============================================================
+# Feed'ler ETag/Last-Modified ile kosullu cekilir, yalnizca yeni basliklar
+# indekse eklenir. Prefetch kapaliysa ya da geride kaldiysa sorgu aninda
+# FEED_STALE_SECS sonrasinda arka planda tazelenir.
+FEED_ITEMS_PER_FETCH        = 50
+FEED_INDEX_MAX_ITEMS        = 4000
+FEED_INDEX_MAX_AGE_SECS     = 48 * 3600
+FEED_RECENCY_HALF_LIFE_SECS = 6 * 3600
+FEED_STALE_SECS             = 180
+FEED_FETCH_TIMEOUT_SECS     = 10
+
+# ============================================================
+# KONUM / HAVA DURUMU / NAMAZ VAKITLERI
+# ============================================================
+# Sorguda yer adi yoksa kullanilan yer; hava durumu istekleri bu derece
+# araliginda bir grid hucresine yuvarlanir (hucre basina tek cache kaydi).
+GEO_DEFAULT_PLACE = "İstanbul"
+WEATHER_GRID_DEG  = 0.1
+
 # ============================================================
 # SCRAPER KURALLARI
 # ============================================================
@@ -100,6 +274,22 @@ SCRAPER_RULES = [
 ]
 DEFAULT_SCRAPERS = ["ddg_instant", "ddg_html"]
 
+# Sonuc donduren scraper'in puani; toplam SCRAPER_EARLY_EXIT_SCORE'a ulasinca
+# run_scrapers diger scraper'lari beklemeden doner. Yuksek puanli kaynaklarin
+# sonuclari ozetin basina yerlesir.
+SCRAPER_PRIORITY = {
+    "exchange": 10, "crypto": 10, "weather": 10, "prayer": 10, "clock": 10,
+    "bist": 9, "yahoo": 9, "earthquake": 9,
+    "alpha_vantage": 8, "apifootball": 8,
+    "mackolik": 7, "flashscore": 7,
+    "rss_news": 6, "wikipedia": 6,
+    "gnews": 5, "newsapi": 5, "ddg_instant": 5,
+    "ddg_html": 4, "turkish_news": 4,
+    "bing": 3,
+}
+SCRAPER_PRIORITY_DEFAULT = 3
+SCRAPER_EARLY_EXIT_SCORE = 10
+
 # ============================================================
 # ARAMA GEREKLİLİK KONTROLÜ
 # ============================================================
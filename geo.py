@@ -0,0 +1,165 @@
+import re
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import prayertimes
+from config import GAZETTEER_FILE, WEATHER_GRID_DEG
+from textnorm import fold
+
+# ============================================================
+# YER ADI SOZLUGU (81 IL + ILCELER + DUNYA SEHIRLERI)
+# ============================================================
+# gazetteer.tsv acilista bir kez okunur; tum es adlar aksanlari katlanmis
+# (textnorm.fold) olarak bir trie'ye yazilir, boylece "Muğla"/"mugla",
+# "İzmir"/"izmir" ayni yola duser. Sorgu yalnizca kelime baslarindan trie'de
+# yurunur; eslesmenin ardindan ya kelime biter ("İstanbul'da") ya da kalan
+# kisim bilinen bir hal/iyelik ekidir ("izmirde", "ankaradaki").
+TR_TZ = timezone(timedelta(hours=3))
+_END = ""  # trie'de terminal anahtari (tek karakterli anahtarlarla cakismaz)
+_SUFFIXES = frozenset("""
+a e i u ya ye yi yu na ne da de ta te dan den tan ten nda nde ndan nden
+daki deki taki teki ndaki ndeki in un nin nun ki li lu lilar liler lular
+""".split())
+_WORD_RE = re.compile(r"\w+")
+
+
+class Place:
+    __slots__ = ("name", "kind", "parent", "lat", "lon", "tz")
+
+    def __init__(self, name, kind, parent, lat, lon, tz):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.lat = lat
+        self.lon = lon
+        self.tz = tz
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({self.parent})" if self.parent else self.name
+
+    def __repr__(self):
+        return f"Place({self.label!r})"
+
+
+def _norm(text: str) -> str:
+    return " ".join(fold(text).split())
+
+
+class Gazetteer:
+    def __init__(self, places: list[Place], aliases: list[list[str]]):
+        self.places = places
+        self._by_name = {}
+        self._trie: dict = {}
+        for place, names in zip(places, aliases):
+            for name in names:
+                key = _norm(name)
+                self._by_name.setdefault(key, place)
+                node = self._trie
+                for ch in key:
+                    node = node.setdefault(ch, {})
+                node.setdefault(_END, place)
+
+    @classmethod
+    def load(cls, path) -> "Gazetteer":
+        places, aliases = [], []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip() or line.startswith("#"):
+                        continue
+                    names, kind, parent, lat, lon, tz = line.rstrip("\n").split("\t")
+                    names = names.split("|")
+                    places.append(Place(names[0], kind, parent, float(lat), float(lon), tz))
+                    aliases.append(names)
+        except (OSError, ValueError) as e:
+            print(f"[GEO] Gazetteer yuklenemedi ({path}): {e}")
+        return cls(places, aliases)
+
+    def get(self, name: str) -> Place | None:
+        return self._by_name.get(_norm(name))
+
+    def find_all(self, text: str) -> list[tuple[int, int, Place]]:
+        # (baslangic, bitis, yer); metin katlanmis haliyle taranir
+        text = _norm(text)
+        n = len(text)
+        out = []
+        for m in _WORD_RE.finditer(text):
+            i = m.start()
+            node = self._trie
+            best = None
+            j = i
+            while j < n and (node := node.get(text[j])) is not None:
+                j += 1
+                place = node.get(_END)
+                if place is not None and self._ends_word(text, j):
+                    best = (i, j, place)
+            if best:
+                out.append(best)
+        return out
+
+    @staticmethod
+    def _ends_word(text: str, j: int) -> bool:
+        if j == len(text) or not text[j].isalnum():
+            return True
+        k = j
+        while k < len(text) and text[k].isalnum():
+            k += 1
+        return text[j:k] in _SUFFIXES
+
+    def resolve(self, text: str) -> Place | None:
+        # ilk gecen yer; ayni sorguda ilcesi de geciyorsa ilce ("İstanbul Kadıköy")
+        matches = self.find_all(text)
+        if not matches:
+            return None
+        best = matches[0][2]
+        if best.kind == "il":
+            for _, _, p in matches:
+                if p.kind == "ilce" and p.parent == best.name:
+                    return p
+        return best
+
+    def stats(self) -> dict:
+        kinds: dict[str, int] = {}
+        for p in self.places:
+            kinds[p.kind] = kinds.get(p.kind, 0) + 1
+        return {"places": len(self.places), "names": len(self._by_name), "kinds": kinds}
+
+
+gazetteer = Gazetteer.load(GAZETTEER_FILE)
+
+
+# ============================================================
+# HAVA DURUMU GRID'I / YEREL SAAT / NAMAZ VAKITLERI
+# ============================================================
+def grid_cell(lat: float, lon: float, deg: float = WEATHER_GRID_DEG) -> tuple[float, float]:
+    # ayni hucredeki yerler ayni open-meteo istegini (upstream cache anahtarini) paylasir
+    return round(round(lat / deg) * deg, 4), round(round(lon / deg) * deg, 4)
+
+
+def _tzinfo(tz: str):
+    if tz == "Europe/Istanbul":
+        return TR_TZ
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def local_now(place: Place) -> datetime:
+    return datetime.now(_tzinfo(place.tz) or TR_TZ)
+
+
+@lru_cache(maxsize=1024)
+def _prayer_times(name: str, lat: float, lon: float, tz: str, day: date) -> dict | None:
+    tzinfo = _tzinfo(tz)
+    if tzinfo is None:
+        return None
+    offset = datetime(day.year, day.month, day.day, 12, tzinfo=tzinfo).utcoffset()
+    return prayertimes.compute(lat, lon, day, offset.total_seconds() / 3600)
+
+
+def prayer_times(place: Place, day: date | None = None) -> dict | None:
+    day = day or local_now(place).date()
+    return _prayer_times(place.name, place.lat, place.lon, place.tz, day)
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+
+import aiofiles
+
+from config import (
+    HISTORY_FILE, HISTORY_LOG_FILE, HISTORY_DIR,
+    HISTORY_SHARD_COMPACT_BYTES, HISTORY_MAX_RESIDENT_USERS,
+)
+from serialization import dumps, dumps_async, loads, loads_async
+
+# ============================================================
+# SOHBET GEÇMİŞİ: KULLANICI BAŞINA SHARD (SNAPSHOT + APPEND-ONLY LOG)
+# ============================================================
+# Her kullanicinin gecmisi history/<xx>/<sha1>.json (snapshot) ve .log dosyalarinda.
+# Kullanici ilk erisimde yuklenir, LRU'da tutulur; LRU'dan dusen kullanicinin
+# yazilmamis kayitlari _pending'de kalir ve bir sonraki flush'ta diske gider.
+#
+# Log kayitlari:
+#   {"op": "add", "u": user_id, "c": chat_id, "i": eski_uzunluk, "m": [mesajlar]}
+#   {"op": "del", "u": user_id, "c": chat_id}
+# "i" sayesinde replay idempotenttir: zaten uygulanmis kayitlar atlanir. Boylece
+# compaction yarida kalsa da, bekleyen kayitlar iki kez uygulansa da sonuc ayni olur.
+
+
+def _apply(data: dict, rec: dict):
+    op = rec.get("op")
+    user_id, chat_id = rec.get("u"), rec.get("c")
+    if user_id is None or chat_id is None:
+        return
+    if op == "add":
+        chat = data.setdefault(user_id, {}).setdefault(chat_id, [])
+        start, msgs = rec.get("i", len(chat)), rec.get("m", [])
+        if len(chat) >= start + len(msgs):
+            return
+        del chat[start:]
+        chat.extend(msgs)
+    elif op == "del":
+        chats = data.get(user_id)
+        if chats:
+            chats.pop(chat_id, None)
+
+
+class HistoryStore:
+    def __init__(self, base_dir=HISTORY_DIR, max_resident=HISTORY_MAX_RESIDENT_USERS,
+                 compact_bytes=HISTORY_SHARD_COMPACT_BYTES):
+        self.base_dir = base_dir
+        self.max_resident = max_resident
+        self.compact_bytes = compact_bytes
+        self.data: OrderedDict[str, dict[str, list]] = OrderedDict()
+        self._pending: dict[str, list[str]] = {}
+        self._log_bytes: dict[str, int] = {}
+        self._loading: dict[str, asyncio.Task] = {}
+        self._migration: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def _paths(self, user_id) -> tuple[str, str]:
+        h = hashlib.sha1(str(user_id).encode("utf-8")).hexdigest()
+        base = os.path.join(self.base_dir, h[:2], h)
+        return base + ".json", base + ".log"
+
+    # ---- yasam dongusu ----
+    async def open(self):
+        os.makedirs(self.base_dir, exist_ok=True)
+        if os.path.exists(HISTORY_FILE) or os.path.exists(HISTORY_LOG_FILE):
+            self._migration = asyncio.create_task(self._migrate_legacy())
+
+    async def _migrate_legacy(self):
+        legacy = {}
+        try:
+            if os.path.exists(HISTORY_FILE):
+                async with aiofiles.open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+                    content = await f.read()
+                if content:
+                    legacy = await loads_async(content)
+            if os.path.exists(HISTORY_LOG_FILE):
+                async with aiofiles.open(HISTORY_LOG_FILE, 'r', encoding='utf-8') as f:
+                    async for line in f:
+                        line = line.strip()
+                        if line:
+                            try:
+                                _apply(legacy, loads(line))
+                            except Exception:
+                                continue
+            async with self._lock:
+                for user_id, chats in legacy.items():
+                    snap, _ = self._paths(user_id)
+                    if not os.path.exists(snap):
+                        await self._write_snapshot(snap, chats)
+            for fn in (HISTORY_FILE, HISTORY_LOG_FILE):
+                if os.path.exists(fn):
+                    os.replace(fn, fn + ".migrated")
+            print(f"[OK] Eski history dosyasi shard'lara tasindi ({len(legacy)} kullanici).")
+        except Exception as e:
+            print(f"[!] History migration hatasi: {e}")
+
+    # ---- okuma ----
+    async def chats(self, user_id) -> dict:
+        chats = self.data.get(user_id)
+        if chats is not None:
+            self.data.move_to_end(user_id)
+            return chats
+        if self._migration and not self._migration.done():
+            await asyncio.shield(self._migration)
+        task = self._loading.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._load_user(user_id))
+            self._loading[user_id] = task
+            task.add_done_callback(lambda t, u=user_id: self._loading.pop(u, None))
+        return await asyncio.shield(task)
+
+    async def _load_user(self, user_id) -> dict:
+        snap, log = self._paths(user_id)
+        wrapper = {user_id: {}}
+        async with self._lock:
+            if os.path.exists(snap):
+                try:
+                    async with aiofiles.open(snap, 'r', encoding='utf-8') as f:
+                        content = await f.read()
+                    if content:
+                        wrapper[user_id] = loads(content)
+                except Exception as e:
+                    print(f"[!] History shard okunamadi ({user_id}): {e}")
+            if os.path.exists(log):
+                async with aiofiles.open(log, 'r', encoding='utf-8') as f:
+                    async for line in f:
+                        line = line.strip()
+                        if line:
+                            try:
+                                _apply(wrapper, loads(line))
+                            except Exception:
+                                continue
+                self._log_bytes[user_id] = os.path.getsize(log)
+        for line in self._pending.get(user_id, ()):
+            _apply(wrapper, loads(line))
+        # yukleme beklenirken baska bir yol kullaniciyi yuklemis olabilir
+        chats = self.data.get(user_id)
+        if chats is None:
+            chats = wrapper[user_id]
+            self._admit(user_id, chats)
+        return chats
+
+    def _admit(self, user_id, chats):
+        self.data[user_id] = chats
+        self.data.move_to_end(user_id)
+        while len(self.data) > self.max_resident:
+            evicted, _ = self.data.popitem(last=False)
+            # kirli kayitlar _pending'de kalir, flush diske yazar
+            if evicted not in self._pending:
+                self._log_bytes.pop(evicted, None)
+
+    # ---- yazma ----
+    async def append(self, user_id, chat_id, *messages):
+        chats = await self.chats(user_id)
+        chat = chats.setdefault(chat_id, [])
+        rec = {"op": "add", "u": user_id, "c": chat_id, "i": len(chat), "m": list(messages)}
+        chat.extend(messages)
+        self._pending.setdefault(user_id, []).append(dumps(rec))
+
+    async def delete_chat(self, user_id, chat_id) -> bool:
+        chats = await self.chats(user_id)
+        if chat_id not in chats:
+            return False
+        del chats[chat_id]
+        self._pending.setdefault(user_id, []).append(
+            dumps({"op": "del", "u": user_id, "c": chat_id}))
+        return True
+
+    async def flush(self):
+        async with self._lock:
+            for user_id in list(self._pending):
+                await self._flush_user(user_id)
+                if user_id not in self.data:
+                    self._log_bytes.pop(user_id, None)
+                elif self._log_bytes.get(user_id, 0) >= self.compact_bytes:
+                    await self._compact_user(user_id)
+
+    async def compact(self):
+        async with self._lock:
+            for user_id in list(self._pending):
+                await self._flush_user(user_id)
+            for user_id in list(self.data):
+                if self._log_bytes.get(user_id, 0) > 0:
+                    await self._compact_user(user_id)
+
+    async def _flush_user(self, user_id):
+        lines = self._pending.get(user_id)
+        if not lines:
+            self._pending.pop(user_id, None)
+            return
+        n = len(lines)
+        chunk = "\n".join(lines) + "\n"
+        _, log = self._paths(user_id)
+        try:
+            os.makedirs(os.path.dirname(log), exist_ok=True)
+            async with aiofiles.open(log, 'a', encoding='utf-8') as f:
+                await f.write(chunk)
+        except Exception as e:
+            print(f"[!] History log yazilamadi ({user_id}): {e}")
+            return
+        # yazim sirasinda eklenen kayitlar listede kalir
+        del lines[:n]
+        if not lines:
+            self._pending.pop(user_id, None)
+        self._log_bytes[user_id] = self._log_bytes.get(user_id, 0) + len(chunk.encode('utf-8'))
+
+    async def _compact_user(self, user_id):
+        snap, log = self._paths(user_id)
+        try:
+            await self._write_snapshot(snap, self.data[user_id])
+            # snapshot log'daki her seyi iceriyor; log sifirlanabilir
+            async with aiofiles.open(log, 'w', encoding='utf-8') as f:
+                await f.write("")
+            self._log_bytes[user_id] = 0
+        except Exception as e:
+            print(f"[!] History compaction hatasi ({user_id}): {e}")
+
+    async def _write_snapshot(self, path, chats):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        content = await dumps_async(chats)
+        async with aiofiles.open(tmp, 'w', encoding='utf-8') as f:
+            await f.write(content)
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.data)
+
+
+history_store = HistoryStore()
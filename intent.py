@@ -0,0 +1,71 @@
+import re
+from datetime import datetime, timezone, timedelta
+from typing import NamedTuple
+
+from config import SCRAPER_RULES, DEFAULT_SCRAPERS, MUST_SEARCH, NO_SEARCH
+
+# ============================================================
+# NİYET YÖNLENDİRİCİ (arama karari + optimize sorgu + scraper seti)
+# ============================================================
+# Tum kurallar import aninda bir kez derlenir ve classify() tek geciste arama
+# kararini, optimize sorguyu ve scraper setini birlikte dondurur.
+# Not: CPython'un backtracking re motorunda tek buyuk alternation (ya da
+# lookahead'li birlesik desen) kural basina derlenmis desen dongusunden
+# yavas cikti (bkz. benchmarks/bench_intent.py); bu yuzden desenler ayri tutuldu.
+
+
+class Intent(NamedTuple):
+    search: bool
+    query: str
+    scrapers: tuple[str, ...]
+    # arama gerekli ama hicbir alan kurali eslesmedi (yalnizca genel web aramasi)
+    borderline: bool = False
+
+
+_NO_SEARCH   = tuple(re.compile(p) for p in NO_SEARCH)
+_MUST_SEARCH = tuple(re.compile(p) for p in MUST_SEARCH)
+_RULES       = tuple((re.compile(p), tuple(scrapers)) for p, scrapers in SCRAPER_RULES)
+
+_TEAMS = ("fenerbahçe", "galatasaray", "beşiktaş", "trabzonspor", "başakşehir",
+          "sivasspor", "konyaspor", "antalyaspor", "alanyaspor")
+_TABLE_RE = re.compile(r"(puan\s*durumu|puan\s*tablosu)")
+_USD_RE   = re.compile(r"(dolar|usd)")
+_EUR_RE   = re.compile(r"(euro|eur)")
+_GOLD_RE  = re.compile(r"(altın|gram\s*altın)")
+_BTC_RE   = re.compile(r"(bitcoin|btc)")
+_NEWS_RE  = re.compile(r"(son\s*dakika|haber)")
+_TR_TZ    = timezone(timedelta(hours=3))
+_DEFAULT  = tuple(DEFAULT_SCRAPERS)
+
+
+def select_scrapers(query: str) -> tuple[str, ...]:
+    msg = query.lower()
+    selected = dict.fromkeys(DEFAULT_SCRAPERS)
+    for pat, scrapers in _RULES:
+        if pat.search(msg):
+            selected.update(dict.fromkeys(scrapers))
+    return tuple(selected)
+
+
+def optimize_query(original: str, msg: str) -> str:
+    today = datetime.now(_TR_TZ).strftime("%d.%m.%Y")
+    for team in _TEAMS:
+        if team in msg:
+            return f"{team} son maç sonucu {today}"
+    if _TABLE_RE.search(msg): return f"süper lig puan durumu {today}"
+    if _USD_RE.search(msg):   return f"dolar TL kuru anlık {today}"
+    if _EUR_RE.search(msg):   return f"euro TL kuru anlık {today}"
+    if _GOLD_RE.search(msg):  return f"gram altın fiyatı {today}"
+    if _BTC_RE.search(msg):   return "bitcoin fiyatı usd try bugün"
+    if "saat kaç" in msg:     return "türkiye saat"
+    if _NEWS_RE.search(msg):  return f"{original} {today}"
+    return original
+
+
+def classify(message: str) -> Intent:
+    msg = message.lower().strip()
+    if any(p.search(msg) for p in _NO_SEARCH) or not any(p.search(msg) for p in _MUST_SEARCH):
+        return Intent(False, "", ())
+    query = optimize_query(message, msg) or message
+    scrapers = select_scrapers(query)
+    return Intent(True, query, scrapers, scrapers == _DEFAULT)
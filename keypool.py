@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+from config import (
+    GEMINI_API_KEYS, GEMINI_KEY_RPM, GEMINI_KEY_BURST,
+    KEY_COOLDOWN_BASE_SECS, KEY_COOLDOWN_MAX_SECS, KEY_STRIKE_HALF_LIFE_SECS, KEY_MAX_WAIT_SECS,
+)
+
+# ============================================================
+# GEMINI KEY HAVUZU
+# ============================================================
+# Her key icin: token bucket (GEMINI_KEY_RPM), kayan gecikme ve hata orani
+# (EWMA), eszamanli istek sayisi ve 429 gecmisi. Secim, kotasi olan ve
+# soguma disindaki key'ler arasindan en dusuk "beklenen bekleme" skoruna
+# gore yapilir. Soguma suresi her 429'da ikiye katlanir; ceza puani
+# KEY_STRIKE_HALF_LIFE_SECS yari omurle azalir.
+#
+# pick() sogumadaki bir key'i de donebilir; cagiran istegi gondermeden once
+# wait_ready() ile key'in acilmasini bekler (429 alan key'e hemen tekrar gidilirse
+# soguma sifirlanir ve yeni 429 gelir). wait_ready disindaki metotlar senkron;
+# tek event loop'ta kilit gerekmez.
+_EWMA_ALPHA = 0.2
+
+
+class KeyState:
+    __slots__ = (
+        "idx", "key", "tokens", "refilled_at", "in_flight", "latency",
+        "error_rate", "strikes", "struck_at", "cooldown_until",
+        "requests", "rate_limited",
+    )
+
+    def __init__(self, idx, key, now):
+        self.idx = idx
+        self.key = key
+        self.tokens = float(GEMINI_KEY_BURST)
+        self.refilled_at = now
+        self.in_flight = 0
+        self.latency = 2.0
+        self.error_rate = 0.0
+        self.strikes = 0.0
+        self.struck_at = now
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+
+    def refill(self, now):
+        self.tokens = min(GEMINI_KEY_BURST, self.tokens + (now - self.refilled_at) * GEMINI_KEY_RPM / 60.0)
+        self.refilled_at = now
+
+    def ready_at(self, now) -> float:
+        # key'in tekrar kullanilabilecegi an (soguma ve kota)
+        t = max(now, self.cooldown_until)
+        if self.tokens < 1.0:
+            t = max(t, now + (1.0 - self.tokens) * 60.0 / GEMINI_KEY_RPM)
+        return t
+
+    def score(self) -> float:
+        return self.latency * (self.in_flight + 1) * (1.0 + 4.0 * self.error_rate)
+
+
+class KeyPool:
+    def __init__(self, keys):
+        now = time.monotonic()
+        self.states = [KeyState(i, k, now) for i, k in enumerate(keys)]
+
+    def pick(self, skip=None) -> KeyState | None:
+        # en uygun key; hepsi kota/sogumadaysa en erken acilacak olan
+        now = time.monotonic()
+        best = fallback = None
+        for st in self.states:
+            if skip and st.idx in skip:
+                continue
+            st.refill(now)
+            if st.ready_at(now) <= now:
+                if best is None or st.score() < best.score():
+                    best = st
+            elif fallback is None or st.ready_at(now) < fallback.ready_at(now):
+                fallback = st
+        return best or fallback
+
+    async def wait_ready(self, st: KeyState, max_wait=KEY_MAX_WAIT_SECS) -> bool:
+        # soguma/kota bitene kadar bekler; max_wait icinde acilmayacaksa False
+        deadline = time.monotonic() + max_wait
+        while True:
+            now = time.monotonic()
+            st.refill(now)
+            ready = st.ready_at(now)
+            if ready <= now:
+                return True
+            if ready > deadline:
+                return False
+            await asyncio.sleep(ready - now)
+
+    def start(self, st: KeyState):
+        st.refill(time.monotonic())
+        st.tokens -= 1.0
+        st.in_flight += 1
+        st.requests += 1
+
+    def finish(self, st: KeyState, latency=None, status=None):
+        # status: HTTP kodu; None = baglanti hatasi/zaman asimi, 0 = iptal
+        st.in_flight = max(0, st.in_flight - 1)
+        if status == 0:
+            return
+        failed = status != 200
+        st.error_rate += _EWMA_ALPHA * ((1.0 if failed else 0.0) - st.error_rate)
+        if status == 200 and latency is not None:
+            st.latency += _EWMA_ALPHA * (latency - st.latency)
+        elif status in (429, 503):
+            self._penalize(st)
+
+    def _penalize(self, st: KeyState):
+        now = time.monotonic()
+        st.strikes = st.strikes * 0.5 ** ((now - st.struck_at) / KEY_STRIKE_HALF_LIFE_SECS) + 1.0
+        st.struck_at = now
+        st.tokens = min(st.tokens, 0.0)
+        st.rate_limited += 1
+        cooldown = min(KEY_COOLDOWN_MAX_SECS, KEY_COOLDOWN_BASE_SECS * 2 ** (st.strikes - 1.0))
+        st.cooldown_until = now + cooldown
+        print(f"[WAIT] Key #{st.idx} rate-limited, {cooldown:.0f}s bekleniyor.")
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [{
+            "key": st.idx,
+            "in_flight": st.in_flight,
+            "tokens": round(st.tokens, 2),
+            "latency": round(st.latency, 3),
+            "error_rate": round(st.error_rate, 3),
+            "cooldown_left": round(max(0.0, st.cooldown_until - now), 1),
+            "requests": st.requests,
+            "rate_limited": st.rate_limited,
+        } for st in self.states]
+
+    def __len__(self):
+        return len(self.states)
+
+
+key_pool = KeyPool(GEMINI_API_KEYS)
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from collections import deque
+
+from config import MODEL_LIMITS, MODEL_LIMIT_DEFAULT, MODEL_QUEUE_DEADLINE_SECS, LIMITER_LATENCY_FACTOR
+
+# ============================================================
+# ADAPTIF ESZAMANLILIK LIMITLERI (AIMD)
+# ============================================================
+# Her (saglayici, mod, key) icin ayri limit: stream ve unary istekler ayri
+# havuzlarda, boylece uzun stream'ler kisa istekleri bloklamaz. Basarili ve
+# limit dolulugunun yarisini asan yukte limit ~1/limit artar (pencere basina
+# +1); 429/503/zaman asimi limiti 0.7 ile, taban gecikmenin
+# LIMITER_LATENCY_FACTOR katini asan yanit 0.9 ile carpar. Sirada bekleyen
+# istek deadline icinde yer bulamazsa LimiterTimeout alir.
+
+
+class LimiterTimeout(Exception):
+    pass
+
+
+class Permit:
+    __slots__ = ("status", "latency", "t0")
+
+    def __init__(self):
+        self.status = None
+        self.latency = None
+        self.t0 = time.perf_counter()
+
+
+class AdaptiveLimiter:
+    def __init__(self, name, initial, min_limit, max_limit):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.rtt_base = None
+        self._waiters: deque[asyncio.Future] = deque()
+        self.queued = 0
+        self.rejected = 0
+
+    async def acquire(self, deadline=MODEL_QUEUE_DEADLINE_SECS):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(fut, deadline)
+        except asyncio.TimeoutError:
+            # 3.12+ wait_for, yer ayni turda verilmis olsa da TimeoutError atar
+            self._hand_off(fut)
+            self.rejected += 1
+            raise LimiterTimeout(f"{self.name} limiti dolu ({self.in_flight}/{int(self.limit)})")
+        except asyncio.CancelledError:
+            self._hand_off(fut)
+            raise
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+
+    def _hand_off(self, fut):
+        # yer verildikten sonra vazgecildiyse yeri siradakine devret
+        if fut.done() and not fut.cancelled():
+            self.in_flight -= 1
+            self._wake()
+
+    def release(self, permit: Permit | None = None, overloaded=False):
+        self.in_flight = max(0, self.in_flight - 1)
+        if overloaded:
+            self.limit = max(self.min_limit, self.limit * 0.7)
+        elif permit is not None and permit.status == 200:
+            latency = permit.latency if permit.latency is not None else time.perf_counter() - permit.t0
+            if self.rtt_base is None or latency < self.rtt_base:
+                self.rtt_base = latency
+            else:
+                # taban yavasca yukari kayar; kalici yavaslama yeni normal olur
+                self.rtt_base += 0.01 * (latency - self.rtt_base)
+            if latency > LIMITER_LATENCY_FACTOR * self.rtt_base:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            elif self.in_flight + 1 >= self.limit / 2:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(None)
+
+    def slot(self, deadline=MODEL_QUEUE_DEADLINE_SECS):
+        return _Slot(self, deadline)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "rtt_base": round(self.rtt_base, 3) if self.rtt_base is not None else None,
+        }
+
+
+class _Slot:
+    __slots__ = ("limiter", "deadline", "permit")
+
+    def __init__(self, limiter, deadline):
+        self.limiter = limiter
+        self.deadline = deadline
+        self.permit = None
+
+    async def __aenter__(self) -> Permit:
+        await self.limiter.acquire(self.deadline)
+        self.permit = Permit()
+        return self.permit
+
+    async def __aexit__(self, exc_type, exc, tb):
+        overloaded = self.permit.status in (429, 503) or (
+            exc_type is not None and issubclass(exc_type, asyncio.TimeoutError))
+        self.limiter.release(self.permit, overloaded)
+        return False
+
+
+_limiters: dict[tuple, AdaptiveLimiter] = {}
+
+
+def model_limiter(provider: str, mode: str, key=None) -> AdaptiveLimiter:
+    lim = _limiters.get((provider, mode, key))
+    if lim is None:
+        initial, lo, hi = MODEL_LIMITS.get(provider, {}).get(mode, MODEL_LIMIT_DEFAULT)
+        name = f"{provider}:{mode}" if key is None else f"{provider}#{key}:{mode}"
+        lim = _limiters[(provider, mode, key)] = AdaptiveLimiter(name, initial, lo, hi)
+    return lim
+
+
+def limiter_stats() -> dict:
+    return {lim.name: lim.stats() for lim in _limiters.values()}
@@ -0,0 +1,71 @@
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from config import METRICS_WINDOW
+
+# ============================================================
+# SAYAÇLAR VE SÜRE ÖLÇÜMLERİ
+# ============================================================
+# Surec ici, hafif bir kayit defteri: sayaclar + son METRICS_WINDOW olcumun
+# kayan penceresi. /api/debug/metrics snapshot() ciktisini dondurur.
+_counters: dict[str, int] = defaultdict(int)
+_samples: dict[str, deque] = {}
+
+
+def incr(name: str, n: int = 1):
+    _counters[name] += n
+
+
+def observe(name: str, value: float):
+    window = _samples.get(name)
+    if window is None:
+        window = _samples[name] = deque(maxlen=METRICS_WINDOW)
+    window.append(value)
+
+
+def percentile(name: str, q: float) -> float | None:
+    window = _samples.get(name)
+    if not window:
+        return None
+    ordered = sorted(window)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def snapshot() -> dict:
+    timings = {}
+    for name, window in _samples.items():
+        ordered = sorted(window)
+        n = len(ordered)
+        timings[name] = {
+            "count": n,
+            "p50": round(ordered[n // 2], 4),
+            "p95": round(ordered[min(n - 1, int(0.95 * n))], 4),
+            "max": round(ordered[-1], 4),
+        }
+    return {"counters": dict(_counters), "timings": timings}
+
+
+class StageTimer:
+    def __init__(self, name: str):
+        self.name = name
+        self.t0 = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, key: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(key, time.perf_counter() - t)
+
+    def mark(self, key: str, secs: float):
+        self.stages[key] = secs
+        observe(f"{self.name}.{key}", secs)
+
+    def report(self):
+        total = time.perf_counter() - self.t0
+        observe(f"{self.name}.total", total)
+        parts = " ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.stages.items())
+        print(f"[TIMING] {self.name}: {parts} total={total * 1000:.0f}ms")
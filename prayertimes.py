@@ -0,0 +1,92 @@
+import math
+from datetime import date
+
+# ============================================================
+# NAMAZ VAKITLERI (YEREL HESAP, DIYANET / METHOD 13)
+# ============================================================
+# Gunes konumundan astronomik hesap (PrayTimes algoritmasi): imsak 18°,
+# yatsi 17°, ikindi golge katsayisi 1. Diyanet'in temkin farklari dakika
+# olarak eklenir (gunes -7, ogle +5, ikindi +4, aksam +7). Ag cagrisi yok;
+# sonuc (koordinat, tarih, saat dilimi) icin saf fonksiyondur.
+FAJR_ANGLE = 18.0
+ISHA_ANGLE = 17.0
+ASR_FACTOR = 1
+SUN_ANGLE = 0.833  # ufuk kirilmasi + gunes yaricapi
+TEMKIN_MINUTES = {"fajr": 0, "sunrise": -7, "dhuhr": 5, "asr": 4, "maghrib": 7, "isha": 0}
+TIME_NAMES = ("fajr", "sunrise", "dhuhr", "asr", "maghrib", "isha")
+
+
+def _dsin(d):
+    return math.sin(math.radians(d))
+
+
+def _dcos(d):
+    return math.cos(math.radians(d))
+
+
+def _fix(a, b):
+    a = a - b * math.floor(a / b)
+    return a + b if a < 0 else a
+
+
+def _julian(day: date) -> float:
+    y, m, d = day.year, day.month, day.day
+    if m <= 2:
+        y -= 1
+        m += 12
+    a = y // 100
+    b = 2 - a + a // 4
+    return math.floor(365.25 * (y + 4716)) + math.floor(30.6001 * (m + 1)) + d + b - 1524.5
+
+
+def _sun_position(jd: float) -> tuple[float, float]:
+    # (deklinasyon, zaman denklemi saat)
+    d = jd - 2451545.0
+    g = _fix(357.529 + 0.98560028 * d, 360)
+    q = _fix(280.459 + 0.98564736 * d, 360)
+    lon = _fix(q + 1.915 * _dsin(g) + 0.020 * _dsin(2 * g), 360)
+    e = 23.439 - 0.00000036 * d
+    ra = math.degrees(math.atan2(_dcos(e) * _dsin(lon), _dcos(lon))) / 15
+    eqt = q / 15 - _fix(ra, 24)
+    decl = math.degrees(math.asin(_dsin(e) * _dsin(lon)))
+    return decl, eqt
+
+
+def compute(lat: float, lon: float, day: date, tz_hours: float) -> dict[str, str | None]:
+    # {"fajr": "HH:MM", ...}; yuksek enlemde tanimsiz vakit None
+    jd = _julian(day) - lon / (15 * 24)
+
+    def mid_day(t):
+        return _fix(12 - _sun_position(jd + t)[1], 24)
+
+    def angle_time(angle, t, before_noon):
+        decl = _sun_position(jd + t)[0]
+        v = (-_dsin(angle) - _dsin(decl) * _dsin(lat)) / (_dcos(decl) * _dcos(lat))
+        if abs(v) > 1:
+            return None
+        half = math.degrees(math.acos(v)) / 15
+        noon = mid_day(t)
+        return noon - half if before_noon else noon + half
+
+    def asr_time(t):
+        decl = _sun_position(jd + t)[0]
+        angle = -math.degrees(math.atan(1 / (ASR_FACTOR + math.tan(math.radians(abs(lat - decl))))))
+        return angle_time(angle, t, False)
+
+    raw = {
+        "fajr": angle_time(FAJR_ANGLE, 5 / 24, True),
+        "sunrise": angle_time(SUN_ANGLE, 6 / 24, True),
+        "dhuhr": mid_day(12 / 24),
+        "asr": asr_time(13 / 24),
+        "maghrib": angle_time(SUN_ANGLE, 18 / 24, False),
+        "isha": angle_time(ISHA_ANGLE, 18 / 24, False),
+    }
+    out = {}
+    for name in TIME_NAMES:
+        t = raw[name]
+        if t is None:
+            out[name] = None
+            continue
+        t = _fix(t + tz_hours - lon / 15 + TEMKIN_MINUTES[name] / 60 + 0.5 / 60, 24)
+        out[name] = f"{int(t):02d}:{int((t - int(t)) * 60):02d}"
+    return out
@@ -0,0 +1,110 @@
+import asyncio
+
+import metrics
+from config import STREAM_FLUSH_SECS, STREAM_FLUSH_CHARS, STREAM_RELAY_QUEUE, STREAM_STALL_SECS
+
+# ============================================================
+# STREAM CIKISI: TOKEN BIRLESTIRME + GERI BASINC
+# ============================================================
+# Model stream'i ayri bir task'ta sinirli bir kuyruga akar; istemciye giden
+# taraf ilk token'i hemen, sonrakileri STREAM_FLUSH_SECS penceresinde ya da
+# STREAM_FLUSH_CHARS karaktere ulasinca tek frame olarak gonderir. Yavas
+# istemci kuyrugu doldurur; STREAM_STALL_SECS boyunca yer acilmazsa model
+# stream'i kapatilir, boylece takilan bir baglanti model kotasini tutmaz.
+_END = object()
+_STATUS = "__STATUS__:"
+
+
+class StreamRelay:
+    def __init__(self, source, flush_secs=STREAM_FLUSH_SECS, flush_chars=STREAM_FLUSH_CHARS,
+                 max_queue=STREAM_RELAY_QUEUE, stall_secs=STREAM_STALL_SECS):
+        self.source = source
+        self.flush_secs = flush_secs
+        self.flush_chars = flush_chars
+        self.stall_secs = stall_secs
+        self.parts: list[str] = []
+        self.stalled = False
+        self._q: asyncio.Queue = asyncio.Queue(max_queue)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    async def _pump(self):
+        try:
+            async for chunk in self.source:
+                if not chunk:
+                    continue
+                if not chunk.startswith(_STATUS):
+                    self.parts.append(chunk)
+                try:
+                    await asyncio.wait_for(self._q.put(chunk), self.stall_secs)
+                except asyncio.TimeoutError:
+                    self.stalled = True
+                    metrics.incr("relay.stalled")
+                    print(f"[RELAY] Istemci {self.stall_secs}s okumadi, model stream'i kapatildi.")
+                    return
+        except Exception as e:
+            print(f"[RELAY] Model stream hatasi: {e}")
+        finally:
+            await self.source.aclose()
+        await self._q.put(_END)
+
+    async def _get(self, task):
+        # pump erken biterse (takilma/hata) kuyruk bosaldiginda _END doner
+        q = self._q
+        if not q.empty():
+            return q.get_nowait()
+        if task.done():
+            return _END
+        getter = asyncio.ensure_future(q.get())
+        try:
+            await asyncio.wait((getter, task), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        if getter.done() and not getter.cancelled():
+            return getter.result()
+        return q.get_nowait() if not q.empty() else _END
+
+    def _drain(self, buf: list, size: int):
+        # kuyrukta hazir olanlari frame'e ekler; durum/bitis ogesini dondurur
+        q = self._q
+        while size < self.flush_chars and not q.empty():
+            item = q.get_nowait()
+            if item is _END or item.startswith(_STATUS):
+                return size, item
+            buf.append(item)
+            size += len(item)
+        return size, None
+
+    async def frames(self):
+        # ("status", metin) / ("token", metin) ciftleri
+        task = asyncio.create_task(self._pump())
+        loop = asyncio.get_running_loop()
+        first = True
+        try:
+            while True:
+                item = await self._get(task)
+                while item is not None:
+                    if item is _END:
+                        return
+                    if item.startswith(_STATUS):
+                        yield "status", item[len(_STATUS):]
+                        item = None
+                        continue
+                    if first:
+                        first = False
+                        yield "token", item
+                        item = None
+                        continue
+                    buf = [item]
+                    deadline = loop.time() + self.flush_secs
+                    size, item = self._drain(buf, len(item))
+                    if item is None and size < self.flush_chars:
+                        await asyncio.sleep(max(0.0, deadline - loop.time()))
+                        size, item = self._drain(buf, size)
+                    metrics.observe("relay.frame_chars", size)
+                    yield "token", "".join(buf)
+        finally:
+            task.cancel()
@@ -1,9 +1,10 @@
-import re
 import asyncio
-from datetime import datetime, timezone, timedelta
 
-from config import SCRAPER_RULES, DEFAULT_SCRAPERS, LIVE_DATA_TIMEOUT_SECS, MUST_SEARCH, NO_SEARCH
+from config import (
+    LIVE_DATA_TIMEOUT_SECS, SCRAPER_PRIORITY, SCRAPER_PRIORITY_DEFAULT, SCRAPER_EARLY_EXIT_SCORE,
+)
 from cache import cache_get, cache_set
+from intent import classify, select_scrapers
 from . import general, finance, news, sports, weather
 
 SCRAPER_REGISTRY = {
@@ -30,18 +31,60 @@ SCRAPER_REGISTRY = {
 }
 
 
-async def run_scrapers(query, names, sess):
-    tasks = []
+# Erken cikistan sonra calismaya devam eden scraper'lar (upstream cache'i doldururlar).
+_LATE_TASKS: set[asyncio.Task] = set()
+
+
+async def _run_named(name, fn, query, sess):
+    try:
+        r = await fn(query, sess)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[!] Scraper {name}: {e}")
+        return name, []
+    return name, r if isinstance(r, list) else []
+
+
+async def run_scrapers(query, names, sess, timeout=LIVE_DATA_TIMEOUT_SECS):
+    # Sonuclar geldikce toplanir; kaynak onceligine gore puan SCRAPER_EARLY_EXIT_SCORE'a
+    # ulasinca beklemeden donulur. Gec kalanlar timeout'a kadar arka planda biter.
+    # (sonuclar, puan) doner; puan esigi gectiyse cagiran ek kaynak beklememeli.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    pending = set()
     for n in dict.fromkeys(names):
         fn = SCRAPER_REGISTRY.get(n)
         if fn:
-            tasks.append(fn(query, sess))
-    nested = await asyncio.gather(*tasks, return_exceptions=True)
-    results = []
-    for r in nested:
-        if isinstance(r, list):
-            results.extend(r)
-    return results
+            pending.add(asyncio.create_task(_run_named(n, fn, query, sess)))
+    ranked, score = [], 0
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                name, items = t.result()
+                if not items:
+                    continue
+                prio = SCRAPER_PRIORITY.get(name, SCRAPER_PRIORITY_DEFAULT)
+                score += prio
+                ranked.extend((prio, item) for item in items)
+            if score >= SCRAPER_EARLY_EXIT_SCORE:
+                break
+    finally:
+        if pending:
+            if score >= SCRAPER_EARLY_EXIT_SCORE:
+                print(f"[WEB] Erken cikis (puan {score}), {len(pending)} scraper arka planda.")
+            else:
+                print(f"[!] Web toplama timeout ({timeout}s): {query}")
+            for t in pending:
+                _LATE_TASKS.add(t)
+                t.add_done_callback(_LATE_TASKS.discard)
+                loop.call_at(deadline, t.cancel)
+    ranked.sort(key=lambda x: -x[0])
+    return [item for _, item in ranked], score
 
 
 def _fallback_raw(items):
@@ -53,25 +96,36 @@ def _fallback_raw(items):
     return " | ".join(parts)[:600] if parts else ""
 
 
-async def fetch_live_data_full(query, sess):
+# Ayni anda gelen ayni sorgular tek bir run_scrapers turunu paylasir.
+_INFLIGHT: dict[str, asyncio.Task] = {}
+
+
+def _inflight_key(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+async def fetch_live_data_full(query, sess, scrapers=None):
     cached = cache_get(query)
     if cached:
         return cached
-    msg = query.lower()
-    selected = set(DEFAULT_SCRAPERS)
-    for pattern, scrapers in SCRAPER_RULES:
-        if re.search(pattern, msg):
-            selected.update(scrapers)
+    key = _inflight_key(query)
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_live_data_uncached(query, sess, scrapers))
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda t, k=key: _INFLIGHT.pop(k, None) if _INFLIGHT.get(k) is t else None)
+    else:
+        print(f"[WEB] '{query}' zaten calisiyor, sonucu bekleniyor.")
+    # shield: bekleyenlerden biri iptal edilirse ortak gorev iptal olmaz
+    return await asyncio.shield(task)
+
+
+async def _fetch_live_data_uncached(query, sess, scrapers=None):
+    selected = scrapers or select_scrapers(query)
     print(f"[WEB] '{query}' -> scraper'lar: {sorted(selected)}")
-    try:
-        results = await asyncio.wait_for(
-            run_scrapers(query, list(selected), sess),
-            timeout=LIVE_DATA_TIMEOUT_SECS,
-        )
-    except asyncio.TimeoutError:
-        print(f"[!] Web toplama timeout ({LIVE_DATA_TIMEOUT_SECS}s): {query}")
-        results = []
-    if len(results) < 2:
+    results, score = await run_scrapers(query, list(selected), sess)
+    # tek ama yuksek oncelikli sonuc (kur, saat, namaz vakti) yeterlidir; Bing'i bekleme
+    if len(results) < 2 and score < SCRAPER_EARLY_EXIT_SCORE:
         print(f"[!] Az sonuc ({len(results)}), Bing ekleniyor...")
         try:
             results.extend(await asyncio.wait_for(general.scrape_bing(query, sess), timeout=4))
@@ -93,28 +147,5 @@ async def fetch_live_data_full(query, sess):
 
 
 async def should_search(message, sess):
-    msg = message.lower().strip()
-    for pat in NO_SEARCH:
-        if re.search(pat, msg):
-            return False, ""
-    for pat in MUST_SEARCH:
-        if re.search(pat, msg):
-            return True, _optimize_query(message, msg)
-    return False, ""
-
-
-def _optimize_query(original, msg):
-    today = datetime.now(timezone(timedelta(hours=3))).strftime("%d.%m.%Y")
-    teams = ["fenerbahçe", "galatasaray", "beşiktaş", "trabzonspor", "başakşehir",
-             "sivasspor", "konyaspor", "antalyaspor", "alanyaspor"]
-    for team in teams:
-        if team in msg:
-            return f"{team} son maç sonucu {today}"
-    if re.search(r"(puan\s*durumu|puan\s*tablosu)", msg): return f"süper lig puan durumu {today}"
-    if re.search(r"(dolar|usd)", msg):                    return f"dolar TL kuru anlık {today}"
-    if re.search(r"(euro|eur)", msg):                     return f"euro TL kuru anlık {today}"
-    if re.search(r"(altın|gram\s*altın)", msg):           return f"gram altın fiyatı {today}"
-    if re.search(r"(bitcoin|btc)", msg):                  return "bitcoin fiyatı usd try bugün"
-    if "saat kaç" in msg:                                 return "türkiye saat"
-    if re.search(r"(son\s*dakika|haber)", msg):           return f"{original} {today}"
-    return original
+    intent = classify(message)
+    return intent.search, intent.query
@@ -0,0 +1,217 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from config import (
+    FEED_ITEMS_PER_FETCH, FEED_INDEX_MAX_ITEMS, FEED_INDEX_MAX_AGE_SECS,
+    FEED_RECENCY_HALF_LIFE_SECS, FEED_STALE_SECS, FEED_FETCH_TIMEOUT_SECS,
+)
+from textnorm import stems
+from utils import conditional_get
+from .parsers import parse_feed
+
+# ============================================================
+# RSS BASLIK INDEKSI
+# ============================================================
+# Feed'ler prefetch zamanlayicisiyla ETag/If-Modified-Since gonderilerek
+# cekilir; 304 ya da degismemis govde ayristirilmaz, degisen feed'den sadece
+# daha once gorulmemis basliklar eklenir. Basliklar Turkce kok kumesiyle
+# (textnorm.stems) ters indekse yazilir; haber sorgusu dokuz HTTP istegi yerine
+# indeks aramasidir. Skor = eslesen kok orani * yakinlik (yari omur) agirligi.
+RSS_SOURCES = [
+    "https://www.ntv.com.tr/son-dakika.rss",
+    "https://www.hurriyet.com.tr/rss/gundem",
+    "https://www.sabah.com.tr/rss/anasayfa.xml",
+    "https://www.milliyet.com.tr/rss/rssNew/sondakikaRss.xml",
+    "https://www.haberturk.com/rss/anasayfa.xml",
+    "https://www.cumhuriyet.com.tr/rss/son_dakika.xml",
+    "https://www.sozcu.com.tr/feed/",
+    "https://www.bloomberght.com/rss",
+    "https://www.ekonomim.com/rss",
+]
+
+# her basligi eslestiren genel haber kelimeleri sorgudan dusulur
+_GENERIC_TERMS = stems("haber haberleri son dakika gündem güncel bugün neler gelişme gelişmeler manşet önemli")
+
+
+def _parse_date(raw: str) -> float | None:
+    if not raw:
+        return None
+    try:
+        return parsedate_to_datetime(raw).timestamp()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        return datetime.fromisoformat(raw.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class Headline:
+    __slots__ = ("id", "key", "title", "desc", "pubdate", "ts", "site", "terms")
+
+    def __init__(self, id, key, title, desc, pubdate, ts, site, terms):
+        self.id = id
+        self.key = key
+        self.title = title
+        self.desc = desc
+        self.pubdate = pubdate
+        self.ts = ts
+        self.site = site
+        self.terms = terms
+
+
+class _FeedState:
+    __slots__ = ("etag", "last_modified", "body_hash", "status", "fetched_at", "items")
+
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.body_hash = None
+        self.status = None
+        self.fetched_at = 0.0
+        self.items = 0
+
+
+class FeedIndex:
+    def __init__(self, sources=RSS_SOURCES):
+        self.sources = list(sources)
+        self._feeds = {url: _FeedState() for url in self.sources}
+        self._items: OrderedDict[int, Headline] = OrderedDict()
+        self._keys: dict[str, int] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._ids = itertools.count()
+        self._task: asyncio.Task | None = None
+        self.refreshed_at = 0.0
+        self.not_modified = 0
+
+    # ---- ingest ----
+    def ingest(self, url: str, xml: str, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        site = url.split("/")[2].replace("www.", "")
+        added = 0
+        for it in parse_feed(xml, FEED_ITEMS_PER_FETCH):
+            title = it["title"]
+            if not title:
+                continue
+            key = it["link"] or f"{site}|{title}"
+            if key in self._keys:
+                continue
+            ts = _parse_date(it["pubdate"])
+            ts = now if ts is None else min(ts, now)
+            if now - ts > FEED_INDEX_MAX_AGE_SECS:
+                continue
+            h = Headline(next(self._ids), key, title, it["desc"], it["pubdate"], ts, site, stems(title))
+            self._items[h.id] = h
+            self._keys[key] = h.id
+            for t in h.terms:
+                self._postings.setdefault(t, set()).add(h.id)
+            added += 1
+        self._evict(now)
+        return added
+
+    def _evict(self, now: float):
+        items = self._items
+        while items:
+            h = next(iter(items.values()))
+            if len(items) <= FEED_INDEX_MAX_ITEMS and now - h.ts <= FEED_INDEX_MAX_AGE_SECS:
+                break
+            self._remove(h)
+
+    def _remove(self, h: Headline):
+        self._items.pop(h.id, None)
+        self._keys.pop(h.key, None)
+        for t in h.terms:
+            ids = self._postings.get(t)
+            if ids is not None:
+                ids.discard(h.id)
+                if not ids:
+                    del self._postings[t]
+
+    # ---- fetch ----
+    async def _fetch(self, sess, url) -> int:
+        st = self._feeds[url]
+        status, body, validators = await conditional_get(
+            sess, url, etag=st.etag, last_modified=st.last_modified, timeout=FEED_FETCH_TIMEOUT_SECS)
+        st.status = status
+        st.fetched_at = time.time()
+        if status == 304:
+            self.not_modified += 1
+            return 0
+        if status != 200 or not body:
+            return 0
+        st.etag = validators.get("etag")
+        st.last_modified = validators.get("last_modified")
+        body_hash = hash(body)
+        if body_hash == st.body_hash:
+            self.not_modified += 1
+            return 0
+        st.body_hash = body_hash
+        added = self.ingest(url, body, st.fetched_at)
+        st.items += added
+        return added
+
+    async def _refresh(self, sess):
+        counts = await asyncio.gather(*[self._fetch(sess, u) for u in self.sources], return_exceptions=True)
+        added = sum(c for c in counts if isinstance(c, int))
+        first = not self.refreshed_at
+        self.refreshed_at = time.time()
+        if added or first:
+            print(f"[FEEDS] {added} yeni baslik, indeks {len(self._items)} baslik / {len(self._postings)} kok.")
+        return added
+
+    def refresh(self, sess) -> asyncio.Future:
+        # ayni anda tek tazeleme; prefetch ve sorgu yolu ayni task'i paylasir
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh(sess))
+        return asyncio.shield(self._task)
+
+    async def ensure_fresh(self, sess):
+        if not self.refreshed_at:
+            await self.refresh(sess)
+        elif time.time() - self.refreshed_at > FEED_STALE_SECS:
+            self.refresh(sess)
+
+    # ---- sorgu ----
+    def search(self, query: str, limit: int = 10) -> list[Headline]:
+        now = time.time()
+        terms = stems(query) - _GENERIC_TERMS
+        if not terms:
+            # konu belirtilmemis ("son dakika haberleri"): en yeni basliklar
+            fresh = (h for h in self._items.values() if now - h.ts <= FEED_INDEX_MAX_AGE_SECS)
+            return heapq.nlargest(limit, fresh, key=lambda h: h.ts)
+        hits: dict[int, int] = {}
+        for t in terms:
+            for i in self._postings.get(t, ()):
+                hits[i] = hits.get(i, 0) + 1
+        n = len(terms)
+        items = self._items
+
+        def score(i):
+            h = items[i]
+            return hits[i] / n * 0.5 ** ((now - h.ts) / FEED_RECENCY_HALF_LIFE_SECS)
+
+        return [items[i] for i in heapq.nlargest(limit, hits, key=score)]
+
+    def stats(self) -> dict:
+        return {
+            "headlines": len(self._items),
+            "terms": len(self._postings),
+            "refreshed_at": self.refreshed_at,
+            "not_modified": self.not_modified,
+            "feeds": {
+                url.split("/")[2].replace("www.", ""): {
+                    "status": st.status,
+                    "items": st.items,
+                    "conditional": bool(st.etag or st.last_modified),
+                }
+                for url, st in self._feeds.items()
+            },
+        }
+
+
+feed_index = FeedIndex()
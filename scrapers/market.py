@@ -0,0 +1,368 @@
+import asyncio
+import time
+
+from config import (
+    EXCHANGERATE_API_KEY, COINGECKO_API_KEY,
+    MARKET_STALE_SECS, MARKET_YAHOO_BATCH, MARKET_FETCH_TIMEOUT_SECS,
+    MARKET_BATCH_WINDOW_SECS, MARKET_COINGECKO_BATCH,
+)
+from batcher import Batcher
+from serialization import loads
+from utils import rand_headers, safe_get, cached_get
+from .parsers import parse_bigpara_rate
+
+# ============================================================
+# PIYASA VERISI: QUOTE TABLOSU
+# ============================================================
+# Takip edilen tum dovizler, coin'ler, BIST hisseleri ve emtialar prefetch
+# zamanlayicisiyla saglayici basina tek toplu istekle tazelenir (er-api
+# latest/USD, frankfurter, coingecko simple/price, Yahoo spark). Scraper'lar
+# tablodan okur; kayit MARKET_STALE_SECS'ten eskiyse ya da hic yoksa o anda
+# doldurulur. Doviz icin er-api ve frankfurter birlikte calisir; sembol
+# basina son care kaynaklar (bigpara, Yahoo chart) yalnizca eksik kalanlar
+# icin ve semboller arasinda paralel cagrilir.
+FX_SYMBOLS = ("USD", "EUR", "GBP", "JPY", "CHF", "SAR", "RUB")
+BIGPARA_SLUGS = {"USD": "dolar", "EUR": "euro", "GBP": "sterlin", "CHF": "frank",
+                 "JPY": "yen", "SAR": "riyal", "RUB": "ruble"}
+
+COIN_IDS = {
+    "bitcoin": "bitcoin", "btc": "bitcoin", "ethereum": "ethereum", "eth": "ethereum",
+    "bnb": "binancecoin", "xrp": "ripple", "solana": "solana", "sol": "solana",
+    "dogecoin": "dogecoin", "doge": "dogecoin", "cardano": "cardano", "ada": "cardano",
+    "avalanche": "avalanche-2", "avax": "avalanche-2", "tether": "tether", "usdt": "tether",
+    "shiba": "shiba-inu", "shib": "shiba-inu", "polkadot": "polkadot", "dot": "polkadot",
+    "litecoin": "litecoin", "ltc": "litecoin", "chainlink": "chainlink", "link": "chainlink",
+}
+
+YAHOO_TICKERS = {
+    "altın": "GC=F", "gold": "GC=F", "gümüş": "SI=F", "silver": "SI=F",
+    "petrol": "CL=F", "oil": "CL=F", "nasdaq": "^IXIC",
+    "s&p": "^GSPC", "s&p 500": "^GSPC", "dow": "^DJI",
+    "apple": "AAPL", "google": "GOOGL", "microsoft": "MSFT",
+    "tesla": "TSLA", "amazon": "AMZN", "nvidia": "NVDA", "meta": "META",
+}
+
+BIST_TICKERS = {
+    "thyao": "THYAO.IS", "thy": "THYAO.IS", "türk hava": "THYAO.IS",
+    "arclk": "ARCLK.IS", "arçelik": "ARCLK.IS", "eregl": "EREGL.IS", "ereğli": "EREGL.IS",
+    "sasa": "SASA.IS", "ekgyo": "EKGYO.IS", "bimas": "BIMAS.IS", "bim": "BIMAS.IS",
+    "migros": "MGROS.IS", "mgros": "MGROS.IS", "krdmd": "KRDMD.IS",
+    "asels": "ASELS.IS", "aselsan": "ASELS.IS", "tuprs": "TUPRS.IS", "tüpraş": "TUPRS.IS",
+    "akbnk": "AKBNK.IS", "akbank": "AKBNK.IS", "garan": "GARAN.IS", "garanti": "GARAN.IS",
+    "ykbnk": "YKBNK.IS", "yapı kredi": "YKBNK.IS", "sahol": "SAHOL.IS", "sabancı": "SAHOL.IS",
+    "kchol": "KCHOL.IS", "koç holding": "KCHOL.IS",
+    "bist": "XU100.IS", "borsa": "XU100.IS", "bist100": "XU100.IS",
+}
+
+# spark istegi isim dondurmez
+SYMBOL_NAMES = {
+    "GC=F": "Altın (ons)", "SI=F": "Gümüş (ons)", "CL=F": "Ham petrol (WTI)",
+    "^IXIC": "Nasdaq", "^GSPC": "S&P 500", "^DJI": "Dow Jones", "XU100.IS": "BIST 100",
+}
+
+TRACKED_COINS = tuple(dict.fromkeys(COIN_IDS.values()))
+TRACKED_TICKERS = tuple(dict.fromkeys((*YAHOO_TICKERS.values(), *BIST_TICKERS.values())))
+
+
+class Quote:
+    __slots__ = ("symbol", "kind", "price", "change_pct", "currency", "name",
+                 "source", "as_of", "fetched_at", "alt_price")
+
+    def __init__(self, symbol, kind, price, *, change_pct=None, currency="", name="",
+                 source="", as_of="", alt_price=None):
+        self.symbol = symbol
+        self.kind = kind
+        self.price = price
+        self.change_pct = change_pct
+        self.currency = currency
+        self.name = name or SYMBOL_NAMES.get(symbol, symbol)
+        self.source = source
+        self.as_of = as_of
+        self.fetched_at = time.time()
+        self.alt_price = alt_price
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def freshness(self) -> str:
+        age = int(self.age)
+        ago = "az önce" if age < 5 else f"{age} sn önce" if age < 120 else f"{age // 60} dk önce"
+        return f"Güncelleme: {self.as_of}, {ago}" if self.as_of else ago
+
+    def meta(self) -> dict:
+        return {"as_of": self.as_of, "age": round(self.age, 1), "source": self.source}
+
+
+def _change(price, prev):
+    if isinstance(price, (int, float)) and isinstance(prev, (int, float)) and prev:
+        return (price - prev) / prev * 100
+    return None
+
+
+def _erapi_url(base):
+    return (f"https://v6.exchangerate-api.com/v6/{EXCHANGERATE_API_KEY}/latest/{base}"
+            if EXCHANGERATE_API_KEY else f"https://open.er-api.com/v6/latest/{base}")
+
+
+def _coingecko():
+    headers = rand_headers({"Accept": "application/json"})
+    if COINGECKO_API_KEY:
+        headers["x-cg-pro-api-key"] = COINGECKO_API_KEY
+        return "https://pro-api.coingecko.com/api/v3/simple/price", headers
+    return "https://api.coingecko.com/api/v3/simple/price", headers
+
+
+def _yahoo_currency(symbol):
+    return "TRY" if symbol.endswith(".IS") else "USD"
+
+
+class MarketData:
+    def __init__(self):
+        self.quotes: dict[str, Quote] = {}
+        self.refreshed_at: dict[str, float] = {}
+        self.failures: dict[str, int] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        # sorgu aninda eksik/bayat semboller: eszamanli kullanicilarin istekleri
+        # MARKET_BATCH_WINDOW_SECS icinde tek coklu-sembol istegine birlesir
+        self.coin_loader = Batcher("coingecko", self._coin_batch, MARKET_BATCH_WINDOW_SECS, MARKET_COINGECKO_BATCH)
+        self.yahoo_loader = Batcher("yahoo", self._yahoo_batch, MARKET_BATCH_WINDOW_SECS, MARKET_YAHOO_BATCH)
+
+    def _put(self, quotes):
+        for q in quotes:
+            old = self.quotes.get(q.symbol)
+            if old is not None and q.name == q.symbol:
+                q.name = old.name
+            self.quotes[q.symbol] = q
+
+    def _fail(self, provider):
+        self.failures[provider] = self.failures.get(provider, 0) + 1
+
+    # ---- saglayicilar (her biri tek toplu istek) ----
+    async def _erapi(self, sess) -> list[Quote]:
+        status, text = await safe_get(sess, _erapi_url("USD"), timeout=MARKET_FETCH_TIMEOUT_SECS)
+        if status != 200 or not text:
+            self._fail("erapi")
+            return []
+        try:
+            d = loads(text)
+            rates = d.get("rates") or d.get("conversion_rates") or {}
+            try_per_usd = rates["TRY"]
+            as_of = d.get("time_last_update_utc", "")[:16]
+            return [Quote(c, "fx", try_per_usd / rates[c], currency="TRY", source="exchangerate_api",
+                          as_of=f"{as_of} UTC" if as_of else "")
+                    for c in FX_SYMBOLS if rates.get(c)]
+        except (ValueError, KeyError, TypeError, ZeroDivisionError):
+            self._fail("erapi")
+            return []
+
+    async def _frankfurter(self, sess) -> list[Quote]:
+        status, text = await safe_get(sess, "https://api.frankfurter.app/latest",
+                                      params={"from": "USD"}, timeout=MARKET_FETCH_TIMEOUT_SECS)
+        if status != 200 or not text:
+            self._fail("frankfurter")
+            return []
+        try:
+            d = loads(text)
+            rates = {**d.get("rates", {}), "USD": 1.0}
+            try_per_usd = rates["TRY"]
+            return [Quote(c, "fx", try_per_usd / rates[c], currency="TRY", source="frankfurter",
+                          as_of=d.get("date", ""))
+                    for c in FX_SYMBOLS if rates.get(c)]
+        except (ValueError, KeyError, TypeError, ZeroDivisionError):
+            self._fail("frankfurter")
+            return []
+
+    async def _bigpara(self, sess, currency) -> Quote | None:
+        # son care, yalnizca toplu saglayicilarda olmayan kur icin, o anda
+        slug = BIGPARA_SLUGS.get(currency)
+        if not slug:
+            return None
+        status, html = await cached_get(sess, f"https://bigpara.hurriyet.com.tr/doviz/{slug}/",
+            headers=rand_headers({"Referer": "https://bigpara.hurriyet.com.tr/"}),
+            timeout=MARKET_FETCH_TIMEOUT_SECS, source="exchange")
+        rate = parse_bigpara_rate(html) if status == 200 and html else None
+        if rate is None:
+            self._fail("bigpara")
+            return None
+        return Quote(currency, "fx", rate, currency="TRY", source="bigpara")
+
+    async def _coingecko(self, sess, ids=TRACKED_COINS) -> list[Quote]:
+        url, headers = _coingecko()
+        status, text = await safe_get(sess, url, headers=headers, timeout=MARKET_FETCH_TIMEOUT_SECS, params={
+            "ids": ",".join(ids), "vs_currencies": "usd,try", "include_24hr_change": "true",
+            "include_last_updated_at": "true"})
+        if status != 200 or not text:
+            self._fail("coingecko")
+            return []
+        try:
+            d = loads(text)
+        except ValueError:
+            self._fail("coingecko")
+            return []
+        out = []
+        for coin_id, prices in d.items():
+            if not isinstance(prices, dict) or "usd" not in prices:
+                continue
+            change = prices.get("usd_24h_change")
+            updated = prices.get("last_updated_at")
+            out.append(Quote(coin_id, "crypto", prices["usd"], alt_price=prices.get("try"),
+                             change_pct=change if isinstance(change, (int, float)) else None,
+                             currency="USD", name=coin_id.title(), source="coingecko",
+                             as_of=time.strftime("%H:%M UTC", time.gmtime(updated)) if updated else ""))
+        return out
+
+    async def _spark(self, sess, symbols) -> list[Quote]:
+        status, text = await safe_get(sess, "https://query1.finance.yahoo.com/v8/finance/spark",
+            params={"symbols": ",".join(symbols), "range": "1d", "interval": "1d"},
+            headers=rand_headers({"Accept": "application/json"}), timeout=MARKET_FETCH_TIMEOUT_SECS)
+        if status != 200 or not text:
+            self._fail("yahoo_spark")
+            return []
+        try:
+            d = loads(text)
+        except ValueError:
+            self._fail("yahoo_spark")
+            return []
+        # v8: {"GC=F": {"close": [...], "previousClose": ...}};
+        # eski bicim: {"spark": {"result": [{"symbol", "response": [{"meta": ...}]}]}}
+        if "spark" in d:
+            rows = {}
+            for r in (d["spark"] or {}).get("result") or []:
+                resp = (r.get("response") or [{}])[0]
+                meta = resp.get("meta", {})
+                rows[r.get("symbol")] = {"price": meta.get("regularMarketPrice"),
+                                         "prev": meta.get("previousClose") or meta.get("chartPreviousClose"),
+                                         "currency": meta.get("currency"), "name": meta.get("shortName")}
+        else:
+            rows = {}
+            for sym, r in d.items():
+                if not isinstance(r, dict):
+                    continue
+                closes = [c for c in r.get("close") or () if c is not None]
+                rows[sym] = {"price": closes[-1] if closes else None,
+                             "prev": r.get("previousClose") or r.get("chartPreviousClose")}
+        out = []
+        as_of = time.strftime("%H:%M UTC", time.gmtime())
+        for sym, r in rows.items():
+            if sym and isinstance(r["price"], (int, float)):
+                out.append(Quote(sym, "equity", r["price"], change_pct=_change(r["price"], r["prev"]),
+                                 currency=r.get("currency") or _yahoo_currency(sym), name=r.get("name") or "",
+                                 source="yahoo_spark", as_of=as_of))
+        return out
+
+    async def _chart(self, sess, symbol) -> Quote | None:
+        status, text = await cached_get(sess, f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}",
+            params={"interval": "1d", "range": "1d"},
+            headers=rand_headers({"Accept": "application/json"}), timeout=MARKET_FETCH_TIMEOUT_SECS,
+            source="yahoo")
+        if status != 200 or not text:
+            self._fail("yahoo_chart")
+            return None
+        try:
+            meta = loads(text)["chart"]["result"][0]["meta"]
+            price = meta["regularMarketPrice"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._fail("yahoo_chart")
+            return None
+        t = meta.get("regularMarketTime")
+        return Quote(symbol, "equity", price, change_pct=_change(price, meta.get("previousClose")),
+                     currency=meta.get("currency") or _yahoo_currency(symbol), name=meta.get("shortName") or "",
+                     source="yahoo_chart", as_of=time.strftime("%H:%M UTC", time.gmtime(t)) if t else "")
+
+    # ---- toplu tazeleme ----
+    async def _refresh_fx(self, sess):
+        # iki toplu saglayici birlikte; er-api oncelikli, frankfurter eksikleri tamamlar
+        primary, secondary = await asyncio.gather(self._erapi(sess), self._frankfurter(sess))
+        self._put(secondary)
+        self._put(primary)
+        return len({q.symbol for q in (*primary, *secondary)})
+
+    async def _refresh_crypto(self, sess):
+        quotes = await self._coingecko(sess)
+        self._put(quotes)
+        return len(quotes)
+
+    async def _refresh_yahoo(self, sess, symbols=TRACKED_TICKERS):
+        batches = [symbols[i:i + MARKET_YAHOO_BATCH] for i in range(0, len(symbols), MARKET_YAHOO_BATCH)]
+        results = await asyncio.gather(*[self._spark(sess, b) for b in batches])
+        n = 0
+        for quotes in results:
+            self._put(quotes)
+            n += len(quotes)
+        return n
+
+    def refresh(self, name, sess) -> asyncio.Future:
+        # saglayici grubu basina tek task; prefetch ve sorgu yolu paylasir
+        task = self._tasks.get(name)
+        if task is None or task.done():
+            job = {"fx": self._refresh_fx, "crypto": self._refresh_crypto, "yahoo": self._refresh_yahoo}[name]
+            task = self._tasks[name] = asyncio.create_task(self._timed(name, job, sess))
+        return asyncio.shield(task)
+
+    async def _timed(self, name, job, sess):
+        n = await job(sess)
+        if n:
+            self.refreshed_at[name] = time.time()
+        return n
+
+    # ---- okuma ----
+    def _missing(self, symbols) -> list[str]:
+        now = time.time()
+        return [s for s in symbols
+                if (q := self.quotes.get(s)) is None or now - q.fetched_at > MARKET_STALE_SECS]
+
+    def _pick(self, symbols) -> list[Quote]:
+        return [q for s in symbols if (q := self.quotes.get(s)) is not None]
+
+    async def fx(self, currencies, sess) -> list[Quote]:
+        if self._missing(currencies):
+            await self.refresh("fx", sess)
+            missing = self._missing(currencies)
+            if missing:
+                found = await asyncio.gather(*[self._bigpara(sess, c) for c in missing])
+                self._put(q for q in found if q)
+        return self._pick(currencies)
+
+    async def _coin_batch(self, ids, sess) -> dict:
+        quotes = await self._coingecko(sess, ids)
+        self._put(quotes)
+        return {q.symbol: q for q in quotes}
+
+    async def _yahoo_batch(self, symbols, sess) -> dict:
+        quotes = await self._spark(sess, symbols)
+        self._put(quotes)
+        return {q.symbol: q for q in quotes}
+
+    async def crypto(self, ids, sess) -> list[Quote]:
+        missing = self._missing(ids)
+        if missing:
+            await self.coin_loader.load_many(missing, sess)
+        return self._pick(ids)
+
+    async def equities(self, symbols, sess) -> list[Quote]:
+        missing = self._missing(symbols)
+        if missing:
+            await self.yahoo_loader.load_many(missing, sess)
+            missing = self._missing(missing)
+            if missing:
+                found = await asyncio.gather(*[self._chart(sess, s) for s in missing])
+                self._put(q for q in found if q)
+        return self._pick(symbols)
+
+    def stats(self) -> dict:
+        now = time.time()
+        kinds: dict[str, dict] = {}
+        for q in self.quotes.values():
+            k = kinds.setdefault(q.kind, {"quotes": 0, "oldest_secs": 0.0})
+            k["quotes"] += 1
+            k["oldest_secs"] = max(k["oldest_secs"], round(now - q.fetched_at, 1))
+        return {
+            "kinds": kinds,
+            "refreshed_secs_ago": {k: round(now - t, 1) for k, t in self.refreshed_at.items()},
+            "failures": dict(self.failures),
+            "batching": {"coingecko": self.coin_loader.stats(), "yahoo": self.yahoo_loader.stats()},
+        }
+
+
+market_data = MarketData()
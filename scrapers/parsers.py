@@ -0,0 +1,221 @@
+import re
+import xml.etree.ElementTree as ET
+from itertools import islice
+
+from utils import clean_html
+
+# ============================================================
+# SAYFA / FEED AYRISTIRICILARI
+# ============================================================
+# Butun desenler import aninda derlenir; scraper'lar ham HTML/XML'i buradaki
+# saf fonksiyonlara verir. Sonuclar finditer + islice ile toplanir, boylece
+# ilk N eslesmeden sonra sayfanin geri kalani taranmaz.
+_S = re.DOTALL
+
+
+def _first(pattern, text, limit):
+    return islice(pattern.finditer(text), limit)
+
+
+# ---- RSS / Atom ----
+# XMLPullParser ile parca parca beslenir ve N item'dan sonra durulur; CDATA
+# ve XML entity'leri parser tarafindan cozulur. Bozuk feed'lerde (kacissiz
+# "&", "&nbsp;" gibi tanimsiz entity'ler) derlenmis regex yoluna dusulur.
+_FEED_CHUNK = 16384
+_ITEM_TAGS = frozenset(("item", "entry"))
+_TITLE_TAGS = frozenset(("title",))
+_DESC_TAGS = frozenset(("description", "summary", "content"))
+_DATE_TAGS = frozenset(("pubDate", "published", "updated", "date"))
+
+_ITEM_RE = re.compile(r'<(item|entry)\b[^>]*>(.*?)</\1>', _S)
+_TITLE_RE = re.compile(r'<title[^>]*>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</title>', _S)
+_DESC_RE = re.compile(r'<(description|summary|content)\b[^>]*>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</\1>', _S)
+_DATE_RE = re.compile(r'<(pubDate|published|updated|dc:date)>(.*?)</\1>', _S)
+_LINK_RE = re.compile(r'<link[^>]*?(?:href="([^"]*)"[^>]*/?>|>(.*?)</link>)', _S)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1] if tag[0] == "{" else tag
+
+
+def _feed_item(title, desc, pubdate, link) -> dict:
+    return {
+        "title": clean_html(title) if title else "",
+        "desc": clean_html(desc) if desc else "",
+        "pubdate": pubdate.strip() if pubdate else "",
+        "link": link.strip() if link else "",
+    }
+
+
+def _parse_feed_xml(xml: str, limit: int) -> list[dict]:
+    parser = ET.XMLPullParser(events=("start", "end"))
+    out = []
+    start = xml.find("<")
+    if start < 0:
+        return out
+    fields = None  # item disindayken (kanal basligi vb.) None
+    for pos in range(start, len(xml), _FEED_CHUNK):
+        parser.feed(xml[pos:pos + _FEED_CHUNK])
+        for event, el in parser.read_events():
+            tag = _local(el.tag)
+            if event == "start":
+                if tag in _ITEM_TAGS:
+                    fields = {}
+                continue
+            if fields is None:
+                continue
+            if tag in _ITEM_TAGS:
+                out.append(_feed_item(fields.get("title"), fields.get("desc"),
+                                      fields.get("pubdate"), fields.get("link")))
+                fields = None
+                el.clear()
+                if len(out) >= limit:
+                    return out
+            elif tag in _TITLE_TAGS:
+                fields.setdefault("title", el.text)
+            elif tag in _DESC_TAGS:
+                fields.setdefault("desc", el.text)
+            elif tag in _DATE_TAGS:
+                fields.setdefault("pubdate", el.text)
+            elif tag == "link":
+                fields.setdefault("link", el.get("href") or el.text)
+    parser.close()
+    return out
+
+
+def _parse_feed_regex(xml: str, limit: int) -> list[dict]:
+    out = []
+    for m in _first(_ITEM_RE, xml, limit):
+        item = m.group(2)
+        title_m = _TITLE_RE.search(item)
+        desc_m = _DESC_RE.search(item)
+        date_m = _DATE_RE.search(item)
+        link_m = _LINK_RE.search(item)
+        out.append(_feed_item(
+            title_m.group(1) if title_m else "",
+            desc_m.group(2) if desc_m else "",
+            date_m.group(2) if date_m else "",
+            (link_m.group(1) or link_m.group(2)) if link_m else "",
+        ))
+    return out
+
+
+def parse_feed(xml: str, limit: int = 10) -> list[dict]:
+    # {"title", "desc", "pubdate", "link"} listesi; title/desc temizlenmis
+    try:
+        return _parse_feed_xml(xml, limit)
+    except ET.ParseError:
+        return _parse_feed_regex(xml, limit)
+
+
+# ---- arama motorlari ----
+_DDG_TITLE_RE = re.compile(r'class="result__a"[^>]*>(.*?)</a>', _S)
+_DDG_SNIPPET_RE = re.compile(r'class="result__snippet"[^>]*>(.*?)</a>', _S)
+_BING_BLOCK_RE = re.compile(r'<li[^>]*class="b_algo"[^>]*>(.*?)</li>', _S)
+_BING_H2_RE = re.compile(r'<h2[^>]*>(.*?)</h2>', _S)
+_BING_P_RE = re.compile(r'<p[^>]*>(.*?)</p>', _S)
+
+
+def parse_ddg_html(html: str, limit: int = 7) -> list[tuple[str, str]]:
+    # (baslik, snippet), ikisi de temizlenmis
+    pairs = zip(_first(_DDG_TITLE_RE, html, limit), _first(_DDG_SNIPPET_RE, html, limit))
+    return [(clean_html(t.group(1)), clean_html(s.group(1))) for t, s in pairs]
+
+
+def parse_bing(html: str, limit: int = 6) -> list[tuple[str, str]]:
+    # (baslik, snippet); <p>'si olmayan bloklar atlanir
+    out = []
+    for m in _first(_BING_BLOCK_RE, html, limit):
+        block = m.group(1)
+        p = _BING_P_RE.search(block)
+        if p:
+            h2 = _BING_H2_RE.search(block)
+            out.append((clean_html(h2.group(1)) if h2 else "", clean_html(p.group(1))))
+    return out
+
+
+# ---- Kandilli ----
+def parse_kandilli(html: str, limit: int = 5) -> list[list[str]]:
+    # ilk <pre> blogunun baslik satirindan sonraki satirlari, bosluga gore bolunmus.
+    # Blok sayfanin cogu oldugu icin lazy regex yerine find() ile kesilir.
+    start = html.find("<pre")
+    if start < 0 or (start := html.find(">", start)) < 0:
+        return []
+    end = html.find("</pre>", start)
+    if end < 0:
+        return []
+    lines = html[start + 1:end].strip().split("\n", limit + 1)[1:limit + 1]
+    return [line.split() for line in lines]
+
+
+# ---- spor ----
+_MACKOLIK_MATCH_RE = re.compile(
+    r'class="[^"]*match-home[^"]*"[^>]*>(.*?)</[^>]+>.*?'
+    r'class="[^"]*match-score[^"]*"[^>]*>(.*?)</[^>]+>.*?'
+    r'class="[^"]*match-away[^"]*"[^>]*>(.*?)</[^>]+>', _S)
+_TR_RE = re.compile(r'<tr[^>]*>(.*?)</tr>', _S)
+_TD_RE = re.compile(r'<td[^>]*>(.*?)</td>', _S)
+_FS_BLOCK_RE = re.compile(r'class="[^"]*event__match[^"]*"[^>]*>(.*?)</div>', _S)
+_FS_HOME_RE = re.compile(r'class="[^"]*event__participant--home[^"]*"[^>]*>(.*?)</div>', _S)
+_FS_AWAY_RE = re.compile(r'class="[^"]*event__participant--away[^"]*"[^>]*>(.*?)</div>', _S)
+_FS_SCORE_RE = re.compile(r'class="[^"]*event__score[^"]*"[^>]*>(.*?)</div>', _S)
+
+
+def parse_mackolik_scores(html: str, limit: int = 8) -> list[tuple[str, str, str]]:
+    return [(clean_html(m.group(1)), clean_html(m.group(2)), clean_html(m.group(3)))
+            for m in _first(_MACKOLIK_MATCH_RE, html, limit)]
+
+
+def parse_mackolik_table(html: str, limit: int = 6) -> list[list[str]]:
+    rows = []
+    for m in _first(_TR_RE, html, limit):
+        cells = [c for c in (clean_html(td) for td in _TD_RE.findall(m.group(1))) if c]
+        rows.append(cells)
+    return rows
+
+
+def parse_flashscore(html: str, limit: int = 15) -> list[tuple[str, str, str]]:
+    out = []
+    for m in _first(_FS_BLOCK_RE, html, limit):
+        block = m.group(1)
+        home_m = _FS_HOME_RE.search(block)
+        away_m = _FS_AWAY_RE.search(block)
+        if home_m and away_m:
+            score_m = _FS_SCORE_RE.search(block)
+            out.append((clean_html(home_m.group(1)), clean_html(score_m.group(1)) if score_m else "-",
+                        clean_html(away_m.group(1))))
+    return out
+
+
+# ---- haber sitesi aramalari ----
+NEWS_SEARCH_PATTERNS = {
+    "ntv":       re.compile(r'class="[^"]*card-title[^"]*"[^>]*>(.*?)</[^>]+>', _S),
+    "hurriyet":  re.compile(r'<h[23][^>]*class="[^"]*title[^"]*"[^>]*>(.*?)</h[23]>', _S),
+    "sabah":     re.compile(r'<h[23][^>]*>(.*?)</h[23]>', _S),
+    "haberturk": re.compile(r'class="[^"]*content-title[^"]*"[^>]*>(.*?)</[a-z]+>', _S),
+    "milliyet":  re.compile(r'class="[^"]*card__title[^"]*"[^>]*>(.*?)</[^>]+>', _S),
+}
+
+
+def parse_news_search(name: str, html: str, limit: int = 3) -> list[str]:
+    return [clean_html(m.group(1)) for m in _first(NEWS_SEARCH_PATTERNS[name], html, limit)]
+
+
+# ---- bigpara ----
+# BigPara'da kur bilgisi genelde span.band veya benzeri elementte
+_BIGPARA_RES = (
+    re.compile(r'class="[^"]*value[^"]*"[^>]*>([\d.,]+)'),
+    re.compile(r'data-value="([\d.]+)"'),
+    re.compile(r'([\d]+[.,][\d]+)\s*TL'),
+)
+
+
+def parse_bigpara_rate(html: str) -> float | None:
+    for pattern in _BIGPARA_RES:
+        m = pattern.search(html)
+        if m:
+            try:
+                return float(m.group(1).replace(",", "."))
+            except ValueError:
+                return None
+    return None
@@ -0,0 +1,66 @@
+import asyncio
+import random
+
+from config import PREFETCH_ENABLED, PREFETCH_INTERVALS
+from . import general, sports
+from .feeds import feed_index
+from .market import market_data
+
+# ============================================================
+# SICAK FEED'LERİ ISITMA
+# ============================================================
+# Gun boyu sorulan kaynaklar (RSS, Super Lig sonuclari, kurlar, altin, Kandilli)
+# kullanicinin kritik yolunda degil, burada periyodik olarak cekilir ve
+# upstream cache'e (utils.cached_get) yazilir. Araliklar cache TTL'lerinden kisa
+# tutulur; boylece scraper'lar bu kaynaklari hep bellekten okur.
+
+
+async def _refresh_rss(sess):
+    # kosullu GET + artimli indeks (scrapers/feeds.py); upstream cache'e yazilmaz
+    await feed_index.refresh(sess)
+
+
+async def _refresh_sports(sess):
+    await sports.fetch_flashscore_results(sess, refresh=True)
+
+
+async def _refresh_exchange(sess):
+    # tum dovizler tek toplu istekle quote tablosuna (scrapers/market.py)
+    await market_data.refresh("fx", sess)
+
+
+async def _refresh_markets(sess):
+    await asyncio.gather(market_data.refresh("yahoo", sess), market_data.refresh("crypto", sess))
+
+
+async def _refresh_earthquake(sess):
+    await general.fetch_kandilli(sess, refresh=True)
+
+
+PREFETCH_JOBS = {
+    "rss": _refresh_rss,
+    "sports": _refresh_sports,
+    "exchange": _refresh_exchange,
+    "markets": _refresh_markets,
+    "earthquake": _refresh_earthquake,
+}
+
+
+async def _job_loop(name, job, interval, sess):
+    # isinmalar ayni anda patlamasin diye kucuk bir baslangic kaydirmasi
+    await asyncio.sleep(random.uniform(0, 3))
+    while True:
+        try:
+            await job(sess)
+        except Exception as e:
+            print(f"[PREFETCH] {name} hata: {e}")
+        await asyncio.sleep(interval * random.uniform(0.9, 1.0))
+
+
+async def run_prefetcher(sess):
+    if not PREFETCH_ENABLED:
+        return
+    jobs = [_job_loop(name, job, PREFETCH_INTERVALS[name], sess)
+            for name, job in PREFETCH_JOBS.items() if PREFETCH_INTERVALS.get(name)]
+    print(f"[PREFETCH] {len(jobs)} feed isitiliyor.")
+    await asyncio.gather(*jobs)
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================
+# JSON KATMANI: orjson > ujson > stdlib
+# ============================================================
+# JSON_BACKEND=orjson|ujson|json ile zorlanabilir; bulunamazsa sıradaki denenir.
+# Çıktı her zaman str ve ensure_ascii=False davranışındadır.
+
+_PREFERRED = os.getenv("JSON_BACKEND", "").strip().lower()
+_ORDER = ["orjson", "ujson", "json"]
+if _PREFERRED in _ORDER:
+    _ORDER.remove(_PREFERRED)
+    _ORDER.insert(0, _PREFERRED)
+
+BACKEND = "json"
+for _name in _ORDER:
+    if _name == "orjson":
+        try:
+            import orjson as _orjson
+        except ImportError:
+            continue
+        _OPTS = _orjson.OPT_NON_STR_KEYS
+        _OPTS_INDENT = _OPTS | _orjson.OPT_INDENT_2
+
+        def dumps(obj, indent=False) -> str:
+            return _orjson.dumps(obj, option=_OPTS_INDENT if indent else _OPTS).decode("utf-8")
+
+        loads = _orjson.loads
+        BACKEND = "orjson"
+        break
+    if _name == "ujson":
+        try:
+            import ujson as _ujson
+        except ImportError:
+            continue
+
+        def dumps(obj, indent=False) -> str:
+            return _ujson.dumps(obj, ensure_ascii=False, indent=2 if indent else 0)
+
+        loads = _ujson.loads
+        BACKEND = "ujson"
+        break
+    if _name == "json":
+        def dumps(obj, indent=False) -> str:
+            return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+        loads = json.loads
+        BACKEND = "json"
+        break
+
+# orjson bytes'i dogrudan okur; digerlerinde bytes girdisi once decode edilir
+# (stdlib json bytes icin encoding tespiti yapar, str'den yavastir).
+if BACKEND == "orjson":
+    loads_bytes = loads
+else:
+    def loads_bytes(data):
+        return loads(data.decode("utf-8", errors="replace"))
+
+# Büyük snapshot'lar event loop'u kilitlemesin diye ayrı thread'de serileştirilir.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="json")
+
+
+async def dumps_async(obj, indent=False) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, dumps, obj, indent)
+
+
+async def loads_async(data):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, loads, data)
@@ -0,0 +1,68 @@
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from config import SHARE_RENDER_TTL_SECS, SHARE_RENDER_CACHE_MAX
+import templates
+
+# ============================================================
+# /share SAYFA CACHE'İ
+# ============================================================
+# Anahtar: (share_id, icerik surumu). Paylasim icerigi degismez; degisen tek
+# sey sayfadaki goruntulenme sayisi, o da en fazla SHARE_RENDER_TTL_SECS eski
+# kalir. gzip/brotli varyantlari render aninda bir kez uretilir.
+
+
+class RenderedPage:
+    __slots__ = ("body", "gzip", "br", "etag", "rendered_at")
+
+    def __init__(self, html: str):
+        self.body = html.encode("utf-8")
+        self.gzip = gzip.compress(self.body, compresslevel=6)
+        self.br = brotli.compress(self.body, quality=9) if brotli else None
+        self.etag = '"' + hashlib.md5(self.body).hexdigest() + '"'
+        self.rendered_at = time.monotonic()
+
+    def encoded(self, accept_encoding: str) -> tuple[bytes, str | None]:
+        accept_encoding = (accept_encoding or "").lower()
+        if self.br is not None and "br" in accept_encoding:
+            return self.br, "br"
+        if "gzip" in accept_encoding:
+            return self.gzip, "gzip"
+        return self.body, None
+
+
+_pages: OrderedDict[tuple[str, str], RenderedPage] = OrderedDict()
+
+
+def _version(data: dict) -> str:
+    return f"{data.get('created_at', '')}:{len(data.get('messages', []))}"
+
+
+def render_shared_chat(share_id: str, data: dict) -> RenderedPage:
+    key = (share_id, _version(data))
+    page = _pages.get(key)
+    if page is not None and time.monotonic() - page.rendered_at < SHARE_RENDER_TTL_SECS:
+        _pages.move_to_end(key)
+        return page
+    page = RenderedPage(templates.shared_chat_html(share_id, data))
+    _pages[key] = page
+    _pages.move_to_end(key)
+    while len(_pages) > SHARE_RENDER_CACHE_MAX:
+        _pages.popitem(last=False)
+    return page
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tags
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+import aiofiles
+
+from config import (
+    SHARED_CHATS_FILE, SHARE_SAVE_DEBOUNCE_SECS, SHARE_VIEW_FLUSH_SECS, SHARE_PURGE_INTERVAL_SECS,
+)
+from serialization import dumps_async, loads_async
+
+# ============================================================
+# PAYLAŞILAN SOHBETLER
+# ============================================================
+# Tum yazimlar tek bir writer gorevinden gecer (run). Icerik degisikligi
+# (yeni paylasim, silme) writer'i uyandirir ve kisa bir debounce'tan sonra
+# yazilir; yalnizca sayac degisikligi (view_count) SHARE_VIEW_FLUSH_SECS'te bir
+# toplu olarak yazilir. Suresi dolan kayitlar arka planda temizlenir.
+
+
+def _is_expired(data: dict, now: datetime) -> bool:
+    exp = data.get("expires_at")
+    if not exp:
+        return False
+    try:
+        return datetime.fromisoformat(exp) <= now
+    except ValueError:
+        return False
+
+
+class ShareStore:
+    def __init__(self, path=SHARED_CHATS_FILE, debounce=SHARE_SAVE_DEBOUNCE_SECS,
+                 view_flush=SHARE_VIEW_FLUSH_SECS, purge_interval=SHARE_PURGE_INTERVAL_SECS):
+        self.path = path
+        self.debounce = debounce
+        self.view_flush = view_flush
+        self.purge_interval = purge_interval
+        self.data: dict[str, dict] = {}
+        self._dirty = False
+        self._views_dirty = False
+        self._wake = asyncio.Event()
+        self._save_lock = asyncio.Lock()
+        self._next_purge = 0.0
+
+    async def load(self):
+        if not os.path.exists(self.path):
+            return
+        async with aiofiles.open(self.path, 'r', encoding='utf-8') as f:
+            content = await f.read()
+        if not content:
+            return
+        try:
+            self.data = await loads_async(content)
+            removed = self.purge_expired()
+            print(f"[OK] {len(self.data)} paylasilan sohbet yuklendi ({removed} suresi dolmus silindi).")
+        except Exception:
+            self.data = {}
+
+    def get(self, share_id) -> dict | None:
+        data = self.data.get(share_id)
+        if data is not None and _is_expired(data, datetime.now(timezone.utc)):
+            del self.data[share_id]
+            self.mark_dirty()
+            return None
+        return data
+
+    def create(self, share_id, data: dict):
+        self.data[share_id] = data
+        self.mark_dirty()
+
+    def record_view(self, share_id) -> int:
+        data = self.data[share_id]
+        data["view_count"] = data.get("view_count", 0) + 1
+        self._views_dirty = True
+        return data["view_count"]
+
+    def purge_expired(self) -> int:
+        now = datetime.now(timezone.utc)
+        expired = [k for k, v in self.data.items() if _is_expired(v, now)]
+        for k in expired:
+            del self.data[k]
+        if expired:
+            self._dirty = True
+        self._next_purge = time.monotonic() + self.purge_interval
+        return len(expired)
+
+    def mark_dirty(self):
+        self._dirty = True
+        self._wake.set()
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.view_flush)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._dirty:
+                # ayni anda gelen paylasimlar tek yazimda birlessin
+                await asyncio.sleep(self.debounce)
+            if time.monotonic() >= self._next_purge:
+                removed = self.purge_expired()
+                if removed:
+                    print(f"[OK] {removed} suresi dolmus paylasim silindi.")
+            if self._dirty or self._views_dirty:
+                await self.save()
+
+    async def save(self):
+        async with self._save_lock:
+            self._dirty = self._views_dirty = False
+            try:
+                content = await dumps_async(self.data)
+                tmp = self.path + ".tmp"
+                async with aiofiles.open(tmp, 'w', encoding='utf-8') as f:
+                    await f.write(content)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                self._dirty = True
+                print(f"[!] Shared chats kayit hatasi: {e}")
+
+    def __len__(self):
+        return len(self.data)
+
+
+share_store = ShareStore()
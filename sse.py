@@ -0,0 +1,69 @@
+from serialization import loads_bytes
+
+# ============================================================
+# SSE DECODER (MODEL STREAM'LERI)
+# ============================================================
+# Gelen parcalar tek bir bytearray'de birikir; satir sonlari find() ile
+# yerinde bulunur ve sadece "data:" payload'i kopyalanir. Tampon her feed()
+# sonunda bir kez kisaltilir, boylece kalan veri satir basina yeniden
+# kopyalanmaz. Payload'lar loads_bytes'a verilir (orjson'da decode edilmeden).
+_DATA = b"data:"
+_DONE = b"[DONE]"
+
+
+class SSEDecoder:
+    __slots__ = ("_buf",)
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, chunk) -> list[bytes]:
+        buf = self._buf
+        buf += chunk
+        out = []
+        start = 0
+        find = buf.find
+        startswith = buf.startswith
+        mv = memoryview(buf)
+        try:
+            while (nl := find(b"\n", start)) >= 0:
+                if startswith(_DATA, start, nl):
+                    a, end = start + 5, nl
+                    if buf[end - 1] == 13:  # \r
+                        end -= 1
+                    if buf[a] == 32:
+                        a += 1
+                    if a < end:
+                        out.append(bytes(mv[a:end]))
+                start = nl + 1
+        finally:
+            mv.release()
+        if start:
+            del buf[:start]
+        return out
+
+    def close(self) -> list[bytes]:
+        # sonu satir sonuyla bitmeyen son olay
+        if not self._buf:
+            return []
+        return self.feed(b"\n")
+
+
+async def iter_sse_json(content):
+    # aiohttp StreamReader'dan JSON olaylari; [DONE] gelince biter
+    dec = SSEDecoder()
+    async for chunk in content.iter_any():
+        for payload in dec.feed(chunk):
+            if payload.rstrip() == _DONE:
+                return
+            try:
+                yield loads_bytes(payload)
+            except ValueError:
+                continue
+    for payload in dec.close():
+        if payload.rstrip() == _DONE:
+            return
+        try:
+            yield loads_bytes(payload)
+        except ValueError:
+            continue
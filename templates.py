@@ -15,7 +15,7 @@ def shared_chat_html(share_id: str, data: dict) -> str:
     messages = data.get("messages", [])
     user_name = data.get("user_name", "Kullanıcı")
 
-    msgs_html = ""
+    parts = []
     for msg in messages:
         sender = msg.get("sender", "user")
         text = (msg.get("text", "") or "").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br>")
@@ -23,11 +23,12 @@ def shared_chat_html(share_id: str, data: dict) -> str:
         bg = "#1a2744" if is_nova else "#151f35"
         border = "#38bdf8" if is_nova else "#8b5cf6"
         label = "🤖 Nova AI" if is_nova else f"👤 {user_name}"
-        msgs_html += f"""
+        parts.append(f"""
         <div style="margin:10px 0;padding:14px 16px;background:{bg};border-left:3px solid {border};border-radius:0 10px 10px 0;">
           <div style="color:{border};font-size:11px;font-weight:bold;margin-bottom:6px;text-transform:uppercase;letter-spacing:1px">{label}</div>
           <div style="color:#e2e8f0;font-size:14px;line-height:1.65;">{text}</div>
-        </div>"""
+        </div>""")
+    msgs_html = "".join(parts)
 
     open_app_url = _intent_url(STORE_URL)
 
@@ -0,0 +1,49 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import scrapers
+from scrapers import general
+
+
+async def _fast_rate(query, sess):
+    return [{"snippet": "USD/TRY: 41.20", "src": "stub"}]
+
+
+async def _slow(query, sess):
+    await asyncio.sleep(30)
+    return [{"snippet": "gec kalan", "src": "stub"}]
+
+
+async def _weak(query, sess):
+    return [{"snippet": "zayif tek sonuc", "src": "stub"}]
+
+
+class LiveDataEarlyExitTest(unittest.IsolatedAsyncioTestCase):
+    async def test_single_top_priority_result_skips_bing(self):
+        registry = {"exchange": _fast_rate, "ddg_html": _slow}
+        bing = mock.AsyncMock(return_value=[])
+        with mock.patch.dict(scrapers.SCRAPER_REGISTRY, registry), \
+                mock.patch.object(general, "scrape_bing", bing), \
+                mock.patch.object(scrapers, "cache_set"):
+            summary = await asyncio.wait_for(
+                scrapers._fetch_live_data_uncached("dolar kuru", None, ["exchange", "ddg_html"]), timeout=1)
+        self.assertIn("41.20", summary)
+        bing.assert_not_awaited()
+
+    async def test_below_threshold_falls_back_to_bing(self):
+        bing = mock.AsyncMock(return_value=[{"snippet": "bing sonucu", "src": "stub"}])
+        with mock.patch.dict(scrapers.SCRAPER_REGISTRY, {"ddg_html": _weak}), \
+                mock.patch.object(general, "scrape_bing", bing), \
+                mock.patch.object(scrapers, "cache_set"):
+            summary = await scrapers._fetch_live_data_uncached("bir soru", None, ["ddg_html"])
+        bing.assert_awaited_once()
+        self.assertIn("bing sonucu", summary)
+
+    async def asyncTearDown(self):
+        for t in list(scrapers._LATE_TASKS):
+            t.cancel()
+
+
+if __name__ == "__main__":
+    unittest.main()
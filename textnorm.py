@@ -0,0 +1,85 @@
+import re
+
+# ============================================================
+# TÜRKÇE METİN NORMALİZASYONU
+# ============================================================
+# str.lower() "I" -> "i" ve "İ" -> "i̇" (noktali birlesik karakter) uretir;
+# Turkce icin once I/İ cevrilir. fold() aksanlari katlar (ç->c, ğ->g ...),
+# boylece "sıralama" ve "siralama" ayni anahtara duser.
+_UPPER_MAP = str.maketrans({"I": "ı", "İ": "i"})
+_FOLD_MAP = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# ozel isim ekleri: "İstanbul'un", "python'da"
+_APOSTROPHE_SUFFIX_RE = re.compile(r"['’]\w*", re.UNICODE)
+
+STOPWORDS = frozenset("""
+acaba ama ancak bana bazi ben beni benim bir biraz birsey biz bize bu buna bunu
+bunun da daha de diye en gibi hangi hem her hic icin ile ise ki kim kimdir mi
+mu misin musun nasil ne neden nedir nerede nereye nicin niye o ona onu
+onun sen sana seni siz size su suna sunu sey ve veya ya yani lutfen
+yapilir yapabilirim yaparim yapmak yap olur olarak oldu olan var yok
+anlat acikla soyle ogret goster
+""".split())
+
+
+def tr_lower(text: str) -> str:
+    return text.translate(_UPPER_MAP).lower()
+
+
+def fold(text: str) -> str:
+    return tr_lower(text).translate(_FOLD_MAP)
+
+
+def tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(_APOSTROPHE_SUFFIX_RE.sub("", fold(text)))
+
+
+def stems(text: str, prefix: int = 5) -> frozenset:
+    # Turkce eklemeli; ilk 5 harf kaba ama ucuz bir kok yaklasimidir
+    return frozenset(t[:prefix] for t in tokens(text) if t not in STOPWORDS and len(t) > 1)
+
+
+# ============================================================
+# SEMANTIK CACHE IMZASI
+# ============================================================
+# Kok kumesi sirayi, sayilari ve olumsuzlugu kaybeder ("13 - 12" ile "12 - 13",
+# "sıralanır" ile "sıralanmaz" ayni kumeye duser). Imza iki parcadir:
+#   - shingles: icerik koklerinin tekli + ardisik ikili (sirali) n-gram kumesi
+#   - exact: sayilar, operatorler ve olumsuzluk isaretleri; sirasiyla birebir
+#     eslesmeden benzerlik hic hesaplanmaz.
+# Baska bir metne gonderme yapan mesajlar ("bunu python ile yaz") baglama
+# bagimlidir; DEICTIC kelimelerden biri gecerse imza uretilmez.
+_SIG_TOKEN_RE = re.compile(r"\d+(?:[.,]\d+)?|\w+|[-+*/^%=<>×÷]", re.UNICODE)
+_OPERATORS = frozenset("-+*/^%=<>×÷")
+# kok + olumsuzluk/yoksunluk eki: "sıralanmaz", "gelmiyor", "anlamadım", "şekersiz"
+_NEG_SUFFIX_RE = re.compile(r"^\w{2,}?(?:m[ae](?:z|d[iu]|y|m|s|n|$)|m[iu]yor|s[iu]z)")
+NEGATIONS = frozenset("degil yok yoktur olmaz asla hic hayir".split())
+DEICTIC = frozenset("""
+bunu sunu onu buna suna ona bunda sunda onda bundan sundan ondan bunun sunun
+bunlar sunlar onlar bunlari sunlari onlari bunlara sunlara onlara
+yukaridaki asagidaki onceki sonraki aynisi aynisini oncekini
+""".split())
+
+
+def signature(text: str, prefix: int = 5) -> tuple[frozenset, tuple, int] | None:
+    # (shingles, exact, icerik kok sayisi); baglama gonderme varsa None
+    toks = _SIG_TOKEN_RE.findall(_APOSTROPHE_SUFFIX_RE.sub("", fold(text)))
+    if DEICTIC.intersection(toks):
+        return None
+    seq, exact = [], []
+    for t in toks:
+        if t[0].isdigit() or t in _OPERATORS:
+            seq.append(t)
+            exact.append(t)
+        elif t in NEGATIONS:
+            seq.append(t)
+            exact.append(t)
+        elif t not in STOPWORDS and len(t) > 1:
+            stem = t[:prefix]
+            if _NEG_SUFFIX_RE.match(t):
+                stem = "!" + stem
+                exact.append(stem)
+            seq.append(stem)
+    content = sum(1 for t in seq if t not in _OPERATORS)
+    shingles = frozenset(seq) | frozenset(f"{a} {b}" for a, b in zip(seq, seq[1:]))
+    return shingles, tuple(exact), content
@@ -1,14 +1,21 @@
+import asyncio
 import random
 import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urlencode
 
 import aiohttp
 
-from config import UA_POOL
+from config import (
+    UA_POOL, SCRAPER_POOL_LIMIT, SCRAPER_POOL_LIMIT_PER_HOST, SCRAPER_DNS_TTL_SECS,
+    SCRAPER_KEEPALIVE_SECS, SCRAPER_HOST_POLICIES, SCRAPER_HOST_CONCURRENCY_DEFAULT,
+)
+from cache import upstream_cache
 
-
-def rand_headers(extra: dict | None = None) -> dict:
-    h = {
-        "User-Agent": random.choice(UA_POOL),
+# UA basina hazir header seti; her cagrida sifirdan dict kurulmaz.
+_BASE_HEADERS = [
+    {
+        "User-Agent": ua,
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
         "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.7,en;q=0.5",
         "Accept-Encoding": "gzip, deflate, br",
@@ -17,38 +24,175 @@ def rand_headers(extra: dict | None = None) -> dict:
         "Upgrade-Insecure-Requests": "1",
         "Cache-Control": "no-cache",
     }
+    for ua in UA_POOL
+]
+
+
+def rand_headers(extra: dict | None = None) -> dict:
+    # extra yoksa paylasilan dict doner; degistirilecekse extra ile cagirin.
+    h = random.choice(_BASE_HEADERS)
     if extra:
-        h.update(extra)
+        h = {**h, **extra}
     return h
 
 
+# Etiketler callback'siz tek sub ile silinir; entity'ler yalnizca metinde "&"
+# varsa tek gecisle cozulur, bosluklar split/join ile toplanir. Eski sirali
+# re.sub zinciriyle ayni sonucu verir ("&amp;lt;" -> "<" dahil); tek fark, bir
+# entity silinince yenisi olusan patolojik girdilerin ("&amp;x&#39;;") korunmasi.
+_TAG_RE = re.compile(r'<[^>]+>')
+_ENTITY_RE = re.compile(r'&amp;(?:(lt|gt|quot)|#\d+|[a-z]+);|&(amp|lt|gt|quot);|&#\d+;|&[a-z]+;')
+_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"'}
+
+
+def _entity_sub(m) -> str:
+    name = m.group(1) or m.group(2)
+    return _ENTITIES[name] if name else ""
+
+
 def clean_html(text: str) -> str:
-    text = re.sub(r'<[^>]+>', ' ', text)
-    text = re.sub(r'&amp;', '&', text)
-    text = re.sub(r'&lt;', '<', text)
-    text = re.sub(r'&gt;', '>', text)
-    text = re.sub(r'&quot;', '"', text)
-    text = re.sub(r'&#\d+;', '', text)
-    text = re.sub(r'&[a-z]+;', '', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    text = _TAG_RE.sub(" ", text)
+    if "&" in text:
+        text = _ENTITY_RE.sub(_entity_sub, text)
+    return " ".join(text.split())
+
+
+# ============================================================
+# SCRAPER TRANSPORT
+# ============================================================
+# Scraper'lar model cagrilarindan ayri bir connector kullanir; boylece bir RSS
+# patlamasi model isteklerinin baglanti havuzunu tuketemez. Host basina
+# eszamanlilik SCRAPER_HOST_POLICIES ile sinirlanir.
+_scraper_session: aiohttp.ClientSession | None = None
+_host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+
+def open_scraper_session() -> aiohttp.ClientSession:
+    global _scraper_session
+    resolver = None
+    try:
+        import aiodns  # noqa: F401
+        resolver = aiohttp.AsyncResolver()
+    except ImportError:
+        pass
+    connector = aiohttp.TCPConnector(
+        ssl=False,
+        limit=SCRAPER_POOL_LIMIT,
+        limit_per_host=SCRAPER_POOL_LIMIT_PER_HOST,
+        use_dns_cache=True,
+        ttl_dns_cache=SCRAPER_DNS_TTL_SECS,
+        keepalive_timeout=SCRAPER_KEEPALIVE_SECS,
+        enable_cleanup_closed=True,
+        resolver=resolver,
+    )
+    _scraper_session = aiohttp.ClientSession(connector=connector)
+    return _scraper_session
+
+
+async def close_scraper_session():
+    global _scraper_session
+    if _scraper_session:
+        await _scraper_session.close()
+        _scraper_session = None
+
+
+@lru_cache(maxsize=32)
+def _timeout(total) -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(total=total)
+
+
+def _host_slot(url: str) -> tuple[asyncio.Semaphore, dict]:
+    host = urlsplit(url).hostname or ""
+    policy = SCRAPER_HOST_POLICIES.get(host, {})
+    sem = _host_semaphores.get(host)
+    if sem is None:
+        sem = asyncio.Semaphore(policy.get("concurrency", SCRAPER_HOST_CONCURRENCY_DEFAULT))
+        _host_semaphores[host] = sem
+    return sem, policy
+
+
+def _request_headers(headers, policy):
+    headers = headers or rand_headers()
+    if policy.get("keepalive") is False:
+        headers = {**headers, "Connection": "close"}
+    return headers
 
 
 async def safe_get(sess, url, *, params=None, headers=None, timeout=12):
+    sem, policy = _host_slot(url)
     try:
-        async with sess.get(url, params=params, headers=headers or rand_headers(),
-                            timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=True) as r:
-            return r.status, await r.text(errors='replace')
+        async with sem:
+            async with (_scraper_session or sess).get(
+                    url, params=params, headers=_request_headers(headers, policy),
+                    timeout=_timeout(timeout), allow_redirects=True) as r:
+                return r.status, await r.text(errors='replace')
     except Exception as e:
         print(f"[!] GET [{url[:55]}]: {e}")
         return 0, ""
 
 
+async def conditional_get(sess, url, *, etag=None, last_modified=None, headers=None, timeout=12):
+    # (status, body, validators); 304'te body bos, validators bir sonraki istekte geri verilir
+    cond = {}
+    if etag:
+        cond["If-None-Match"] = etag
+    if last_modified:
+        cond["If-Modified-Since"] = last_modified
+    sem, policy = _host_slot(url)
+    try:
+        async with sem:
+            async with (_scraper_session or sess).get(
+                    url, headers=_request_headers({**(headers or rand_headers()), **cond}, policy),
+                    timeout=_timeout(timeout), allow_redirects=True) as r:
+                validators = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+                if r.status != 200:
+                    return r.status, "", validators
+                return r.status, await r.text(errors='replace'), validators
+    except Exception as e:
+        print(f"[!] GET [{url[:55]}]: {e}")
+        return 0, "", {}
+
+
 async def safe_post(sess, url, *, data=None, json_body=None, headers=None, timeout=12):
+    sem, policy = _host_slot(url)
     try:
-        async with sess.post(url, data=data, json=json_body, headers=headers or rand_headers(),
-                             timeout=aiohttp.ClientTimeout(total=timeout)) as r:
-            return r.status, await r.text(errors='replace')
+        async with sem:
+            async with (_scraper_session or sess).post(
+                    url, data=data, json=json_body, headers=_request_headers(headers, policy),
+                    timeout=_timeout(timeout)) as r:
+                return r.status, await r.text(errors='replace')
     except Exception as e:
         print(f"[!] POST [{url[:55]}]: {e}")
         return 0, ""
+
+
+# ============================================================
+# UPSTREAM CACHE'LI GET
+# ============================================================
+# Yalnizca 200 + bos olmayan cevaplar cache'lenir. Ayni URL icin eszamanli
+# istekler tek bir upstream cagrisini paylasir.
+_upstream_inflight: dict[str, asyncio.Task] = {}
+
+
+def _upstream_key(url, params) -> str:
+    if not params:
+        return url
+    return url + ("&" if "?" in url else "?") + urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+
+
+async def cached_get(sess, url, *, source, params=None, headers=None, timeout=12, refresh=False):
+    cache = upstream_cache(source)
+    key = _upstream_key(url, params)
+    if not refresh:
+        body = cache.get(key)
+        if body is not None:
+            return 200, body
+    task = _upstream_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(safe_get(sess, url, params=params, headers=headers, timeout=timeout))
+        _upstream_inflight[key] = task
+        task.add_done_callback(lambda t, k=key: _upstream_inflight.pop(k, None))
+    status, body = await asyncio.shield(task)
+    if status == 200 and body:
+        cache.set(key, body)
+    return status, body